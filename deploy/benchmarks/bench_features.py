@@ -0,0 +1,115 @@
+# benchmarks/bench_features.py
+"""
+Micro-benchmark: pandas prepare_features vs the precompiled FeatureEncoder.
+
+Checks both encoders produce identical matrices on rows of
+model/cleaned_data.csv, then times single-request and batch encoding.
+
+Run from deploy/:  python benchmarks/bench_features.py
+"""
+import json
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
+
+from lib.features import FeatureEncoder  # noqa: E402
+from lib.streaming import extract_records  # noqa: E402
+
+MODEL_DIR = os.path.join(DEPLOY_DIR, "..", "model")
+
+with open(os.path.join(MODEL_DIR, "features_schema.json"), "r") as f:
+    FEATURE_COLUMNS = json.load(f)
+
+with open(os.path.join(MODEL_DIR, "frequency_maps.json"), "r") as f:
+    FREQ_MAPS = json.load(f)
+
+
+# The pandas implementation FeatureEncoder replaced, kept as the reference
+def legacy_prepare_features(request: dict) -> pd.DataFrame:
+    df = pd.DataFrame([{
+        "SQUAREFOOTAGE": request["square_footage"],
+        "BEDROOMS": request["bedrooms"],
+        "BATHROOMS": request["bathrooms"],
+        "LATITUDE": request["latitude"],
+        "LONGITUDE": request["longitude"],
+        "CITY": request["city"],
+        "STATE": request["state"],
+        "ZIPCODE": request["zipcode"],
+        "PROPERTYTYPE": request["propertytype"],
+        "LISTEDDATE": pd.to_datetime(request["listed_date"])
+    }])
+
+    df["LISTING_YEAR"] = df["LISTEDDATE"].dt.year
+    df["LISTING_MONTH"] = df["LISTEDDATE"].dt.month
+    df["LISTING_DAY"] = df["LISTEDDATE"].dt.day
+    df.drop(columns=["LISTEDDATE"], inplace=True)
+
+    for col in ["ZIPCODE", "CITY", "STATE"]:
+        freq_map = FREQ_MAPS.get(col, {})
+        df[col] = df[col].map(freq_map).fillna(0)
+
+    for col in FEATURE_COLUMNS:
+        if col.startswith("PROPERTYTYPE_"):
+            df[col] = 0
+
+    prop_col = f"PROPERTYTYPE_{request['propertytype']}"
+    if prop_col in df.columns:
+        df[prop_col] = 1
+
+    return df.reindex(columns=FEATURE_COLUMNS, fill_value=0)
+
+
+def load_requests(n: int) -> list:
+    data = pd.read_csv(os.path.join(MODEL_DIR, "cleaned_data.csv"), nrows=n)
+    requests = extract_records(data.to_dict("records"))
+    # Unseen categories must fall back to 0 in both encoders
+    requests.append({
+        "square_footage": 900.0, "bedrooms": 1, "bathrooms": 1.0,
+        "latitude": 0.0, "longitude": 0.0, "city": "Nowhere", "state": "ZZ",
+        "zipcode": "00000", "propertytype": "Castle", "listed_date": date(2024, 2, 29),
+    })
+    return requests
+
+
+def per_call_us(fn, arg, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    encoder = FeatureEncoder(FEATURE_COLUMNS, FREQ_MAPS)
+    requests = load_requests(2000)
+
+    # Parity on every row
+    legacy = np.vstack([legacy_prepare_features(r).values for r in requests]).astype(np.float64)
+    compiled = encoder.encode(requests)
+    if not np.array_equal(legacy, compiled):
+        bad = np.argwhere(legacy != compiled)[:5]
+        raise SystemExit(f"Encoders disagree at (row, col): {bad.tolist()}")
+    print(f"Parity: {len(requests)} rows identical")
+
+    one = requests[0]
+    legacy_one = per_call_us(legacy_prepare_features, one, 300)
+    compiled_one = per_call_us(encoder.encode_one, one, 20000)
+    print(f"single request : pandas {legacy_one:9.1f} us | encoder {compiled_one:7.2f} us | "
+          f"{legacy_one / compiled_one:6.0f}x")
+
+    for batch_size in (100, 1000):
+        batch = requests[:batch_size]
+        legacy_batch = per_call_us(lambda b: [legacy_prepare_features(r) for r in b], batch, 2)
+        compiled_batch = per_call_us(encoder.encode, batch, 50)
+        print(f"batch of {batch_size:5d} : pandas {legacy_batch / 1e3:9.1f} ms | "
+              f"encoder {compiled_batch / 1e3:7.2f} ms | {legacy_batch / compiled_batch:6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# benchmarks/bench_inference.py
+"""
+In-process benchmark of the pricing inference path.
+
+Builds PricingRequest payloads from rows of model/cleaned_data.csv and
+times each stage of inference.py separately at several batch sizes:
+
+  encode    prepare_features_batch   (requests -> feature matrix)
+  forest    predict_trees            (feature matrix -> per-tree matrix)
+  interval  summarize_tree_preds     (per-tree matrix -> price + 90% interval)
+  score     score_requests           (all of the above, result cache off)
+
+For each (stage, batch size) it reports p50/p99 latency, rows/sec and
+peak traced memory, and can write the results as JSON and compare them
+against a stored baseline.
+
+Run from deploy/:
+  python benchmarks/bench_inference.py --output bench.json
+  python benchmarks/bench_inference.py --baseline bench.json --tolerance 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
+
+# Every scored row must reach the forest
+os.environ["PREDICT_CACHE_SIZE"] = "0"
+import inference  # noqa: E402
+from lib.scoring import summarize_tree_preds  # noqa: E402
+from lib.streaming import extract_records  # noqa: E402
+
+DATA_PATH = os.path.join(DEPLOY_DIR, "..", "model", "cleaned_data.csv")
+DEFAULT_BATCH_SIZES = [1, 10, 100, 1000, 10000]
+STAGES = ("encode", "forest", "interval", "score")
+
+
+def load_requests(n: int, seed: int) -> list:
+    """n PricingRequests drawn (with replacement) from cleaned_data.csv rows."""
+    data = pd.read_csv(DATA_PATH).sample(n=n, replace=True, random_state=seed)
+    return [inference.PricingRequest(**r) for r in extract_records(data.to_dict("records"))]
+
+
+def stage_callables(requests: list) -> dict:
+    """Zero-argument callables per stage, with inputs precomputed outside the timing."""
+    X = inference.prepare_features_batch(requests)
+    tree_preds = inference.predict_trees(X)
+    return {
+        "encode": lambda: inference.prepare_features_batch(requests),
+        "forest": lambda: inference.predict_trees(X),
+        "interval": lambda: summarize_tree_preds(tree_preds),
+        "score": lambda: inference.score_requests(requests),
+    }
+
+
+def time_calls(fn, min_repeats: int, budget_s: float) -> np.ndarray:
+    fn()  # warm-up
+    timings = []
+    deadline = time.perf_counter() + budget_s
+    while len(timings) < min_repeats or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+        if len(timings) >= 10000:
+            break
+    return np.asarray(timings)
+
+
+def peak_memory_mb(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def run(batch_sizes, min_repeats: int, budget_s: float, seed: int) -> dict:
+    pool = load_requests(max(batch_sizes), seed)
+    inference.warm_up()
+
+    results = []
+    for batch_size in batch_sizes:
+        calls = stage_callables(pool[:batch_size])
+        for stage in STAGES:
+            timings = time_calls(calls[stage], min_repeats, budget_s)
+            p50, p99 = np.percentile(timings, [50, 99])
+            results.append({
+                "stage": stage,
+                "batch_size": batch_size,
+                "repeats": len(timings),
+                "p50_ms": round(p50 * 1e3, 4),
+                "p99_ms": round(p99 * 1e3, 4),
+                "rows_per_sec": round(batch_size / p50, 1),
+                "peak_mem_mb": round(peak_memory_mb(calls[stage]), 3),
+            })
+
+    forest = inference.get_forest()
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "n_trees": forest.n_trees,
+            "n_nodes": forest.n_nodes,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def print_table(report: dict):
+    print(f"{'stage':<9} {'batch':>6} {'p50 ms':>10} {'p99 ms':>10} {'rows/s':>12} {'peak MB':>9}")
+    for r in report["results"]:
+        print(f"{r['stage']:<9} {r['batch_size']:>6} {r['p50_ms']:>10.3f} {r['p99_ms']:>10.3f} "
+              f"{r['rows_per_sec']:>12.0f} {r['peak_mem_mb']:>9.2f}")
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> bool:
+    """Print p50 changes vs the baseline; False if any slowed down beyond tolerance."""
+    base = {(r["stage"], r["batch_size"]): r for r in baseline["results"]}
+    ok = True
+    print(f"\nvs baseline from {baseline['meta'].get('timestamp', '?')} (tolerance {tolerance:.0%}):")
+    print(f"{'stage':<9} {'batch':>6} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for r in report["results"]:
+        b = base.get((r["stage"], r["batch_size"]))
+        if b is None:
+            continue
+        change = r["p50_ms"] / b["p50_ms"] - 1 if b["p50_ms"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"{r['stage']:<9} {r['batch_size']:>6} {b['p50_ms']:>10.3f} {r['p50_ms']:>10.3f} {change:>+8.1%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--min-repeats", type=int, default=5, help="minimum timed calls per measurement")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds of timed calls per measurement")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+
+    report = run(sorted(args.batch_sizes), args.min_repeats, args.budget, args.seed)
+    print_table(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/interval_report.py
+"""
+Compare per-tree percentile intervals with split-conformal intervals.
+
+Coverage: the notebook's held-out rows (cleaned_data.csv test split, per-tree
+predictions from rf_tree_predictions.npy) are split in half many times;
+conformal thresholds are calibrated on one half and both methods are scored
+on the other, so conformal coverage is measured out of sample. Reports
+coverage and mean interval width overall and per property type.
+
+Latency: times score_requests() with interval="trees" and "conformal" on
+the same requests at several batch sizes, result cache off.
+
+Run from deploy/:
+  python benchmarks/interval_report.py --repeats 50 --batch-sizes 1 100 1000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
+
+os.environ["PREDICT_CACHE_SIZE"] = "0"
+import inference  # noqa: E402
+from calibrate_intervals import TREE_PREDS_PATH, held_out_rows  # noqa: E402
+from lib.conformal import ConformalIntervals, build_calibration  # noqa: E402
+from lib.scoring import tree_pred_bounds  # noqa: E402
+from lib.streaming import extract_records  # noqa: E402
+
+
+def coverage_report(test, tree_preds: np.ndarray, repeats: int, coverage: float, seed: int):
+    actual = test["PRICE"].to_numpy(dtype=np.float64)
+    ptypes = test["PROPERTYTYPE"].astype(str).to_numpy()
+    points, tree_lower, tree_upper = tree_pred_bounds(tree_preds)
+
+    rng = np.random.default_rng(seed)
+    groups = ["all"] + sorted(set(ptypes))
+    acc = {(m, g): [] for m in ("trees", "conformal") for g in groups}
+
+    for _ in range(repeats):
+        order = rng.permutation(len(actual))
+        cal, ev = order[: len(order) // 2], order[len(order) // 2:]
+        intervals = ConformalIntervals(build_calibration(points[cal], actual[cal], ptypes[cal], coverage=coverage))
+        conf_lower, conf_upper = intervals.bounds(points[ev], ptypes[ev])
+
+        for method, lo, hi in (("trees", tree_lower[ev], tree_upper[ev]), ("conformal", conf_lower, conf_upper)):
+            inside = (actual[ev] >= lo) & (actual[ev] <= hi)
+            width = hi - lo
+            for g in groups:
+                mask = np.ones(len(ev), dtype=bool) if g == "all" else ptypes[ev] == g
+                if mask.any():
+                    acc[(method, g)].append((inside[mask].mean(), width[mask].mean(), mask.sum()))
+
+    print(f"Coverage on {len(actual)} held-out rows, {repeats} calibrate/evaluate splits "
+          f"(target {coverage:.0%}):")
+    print(f"  {'group':<15} {'n':>6} {'trees cov':>10} {'trees width':>12} {'conf cov':>9} {'conf width':>11}")
+    for g in groups:
+        if not acc[("trees", g)]:
+            continue
+        t = np.asarray(acc[("trees", g)])
+        c = np.asarray(acc[("conformal", g)])
+        print(f"  {g:<15} {int(t[:, 2].mean()):>6} {t[:, 0].mean():>10.1%} {t[:, 1].mean():>12.0f} "
+              f"{c[:, 0].mean():>9.1%} {c[:, 1].mean():>11.0f}")
+
+
+def latency_report(test, batch_sizes, min_repeats: int, budget_s: float):
+    requests = [
+        inference.PricingRequest(**r) for r in extract_records(test.head(max(batch_sizes)).to_dict("records"))
+    ]
+    inference.warm_up()
+
+    print("\nscore_requests latency, p50 ms (result cache off):")
+    print(f"  {'batch':>6} {'trees':>10} {'conformal':>10} {'saved':>7}")
+    for n in batch_sizes:
+        batch = requests[:n]
+        p50 = {}
+        for method in ("trees", "conformal"):
+            inference.score_requests(batch, method)  # warm-up
+            timings = []
+            deadline = time.perf_counter() + budget_s
+            while len(timings) < min_repeats or time.perf_counter() < deadline:
+                start = time.perf_counter()
+                inference.score_requests(batch, method)
+                timings.append(time.perf_counter() - start)
+            p50[method] = np.median(timings) * 1e3
+        saved = 1 - p50["conformal"] / p50["trees"]
+        print(f"  {n:>6} {p50['trees']:>10.3f} {p50['conformal']:>10.3f} {saved:>7.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=50, help="random calibrate/evaluate splits")
+    parser.add_argument("--coverage", type=float, default=0.9)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--min-repeats", type=int, default=5, help="minimum timed calls per batch size")
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds of timed calls per measurement")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    test = held_out_rows()
+    tree_preds = np.load(TREE_PREDS_PATH, mmap_mode="r")
+    coverage_report(test, tree_preds, args.repeats, args.coverage, args.seed)
+
+    if inference.get_conformal() is None:
+        print(f"\n{inference.CONFORMAL_PATH} not found; run calibrate_intervals.py for the latency comparison")
+        return
+    latency_report(test, sorted(args.batch_sizes), args.min_repeats, args.budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+# benchmarks/loadgen.py
+"""
+Open-loop HTTP load generator for the pricing API.
+
+Either starts inference.py locally (WORKERS, batching and caching set from
+the flags below) or targets an already running server with --url. Request
+payloads are drawn from model/cleaned_data.csv and, when present,
+deploy/Agent.csv, mixed by weight. A fraction of requests can go to
+/predict/batch instead of /predict.
+
+Requests are fired on a fixed schedule (constant or Poisson arrivals) at
+each target rate, whether or not earlier ones have finished, so an
+overloaded server shows up as rising latency and errors, not as a quietly
+lower send rate. Latency is measured from the scheduled send time, which
+includes any wait for a free connection. Connections are kept alive and
+pooled unless --no-keepalive is set.
+
+Throughput, latency percentiles and errors are printed per reporting
+interval and summarised per rate step; --output writes everything as JSON.
+
+Run from deploy/:
+  python benchmarks/loadgen.py --rates 50 100 200 --duration 20 --workers 2
+  python benchmarks/loadgen.py --url http://127.0.0.1:3000 --rates 100 --mix cleaned=0.7 agent=0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
+
+from lib.streaming import extract_records  # noqa: E402
+from local_server import free_port, wait_ready  # noqa: E402
+
+SOURCES = {
+    "cleaned": os.path.join(DEPLOY_DIR, "..", "model", "cleaned_data.csv"),
+    "agent": os.path.join(DEPLOY_DIR, "Agent.csv"),
+}
+REQUIRED_COLUMNS = ["SQUAREFOOTAGE", "BEDROOMS", "BATHROOMS", "LATITUDE", "LONGITUDE",
+                    "CITY", "STATE", "ZIPCODE", "PROPERTYTYPE", "LISTEDDATE"]
+
+
+# Payloads
+def load_records(path: str, limit: int, seed: int) -> list:
+    """PricingRequest dicts from an extract with the uppercase Snowflake columns."""
+    data = pd.read_csv(path, usecols=lambda c: c in REQUIRED_COLUMNS).dropna()
+    if set(REQUIRED_COLUMNS) - set(data.columns):
+        raise ValueError(f"{path} is missing columns {sorted(set(REQUIRED_COLUMNS) - set(data.columns))}")
+    if len(data) > limit:
+        data = data.sample(n=limit, random_state=seed)
+    zipcodes = pd.to_numeric(data["ZIPCODE"], errors="coerce")
+    data = data[zipcodes.notna()]
+    records = extract_records(data.to_dict("records"))
+    for record in records:
+        # Some extracts carry a time of day
+        record["listed_date"] = str(record["listed_date"])[:10]
+    return records
+
+
+def parse_mix(items: list) -> dict:
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition("=")
+        if name not in SOURCES:
+            raise SystemExit(f"Unknown source {name!r}; choose from {sorted(SOURCES)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class RequestMix:
+    """Pre-encoded request bodies, drawn by source weight and endpoint fraction."""
+
+    def __init__(self, mix: dict, per_source: int, batch_fraction: float, batch_size: int, seed: int):
+        self.records = {}
+        for name, weight in mix.items():
+            if weight <= 0:
+                continue
+            if not os.path.exists(SOURCES[name]):
+                print(f"Skipping {name}: {SOURCES[name]} not found")
+                continue
+            self.records[name] = load_records(SOURCES[name], per_source, seed)
+            print(f"Loaded {len(self.records[name])} payloads from {name}")
+        if not self.records:
+            raise SystemExit("No payload sources available")
+
+        self.names = list(self.records)
+        self.weights = [mix[n] for n in self.names]
+        self.singles = {n: [json.dumps(r).encode() for r in recs] for n, recs in self.records.items()}
+        self.batch_fraction = batch_fraction
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    def next(self) -> tuple:
+        """(endpoint label, path, body bytes)"""
+        name = self.rng.choices(self.names, self.weights)[0]
+        if self.batch_fraction and self.rng.random() < self.batch_fraction:
+            rows = self.rng.choices(self.records[name], k=self.batch_size)
+            return f"{name}:batch", "/predict/batch", json.dumps(rows).encode()
+        return f"{name}:single", "/predict", self.rng.choice(self.singles[name])
+
+
+# HTTP/1.1 client
+class Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, host: str, path: str, body: bytes, keep_alive: bool) -> int:
+        head = (
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        self.writer.write(head.encode() + body)
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        status = int(status_line.split()[1])
+
+        length, chunked, close = 0, False, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == "content-length":
+                length = int(value)
+            elif name == "transfer-encoding" and "chunked" in value:
+                chunked = True
+            elif name == "connection" and value == "close":
+                close = True
+
+        if chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length:
+            await self.reader.readexactly(length)
+
+        self.reusable = keep_alive and not close
+        return status
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool:
+    def __init__(self, host: str, port: int, size: int, keep_alive: bool):
+        self.host = host
+        self.port = port
+        self.keep_alive = keep_alive
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.opened = 0
+
+    async def request(self, path: str, body: bytes, timeout: float) -> int:
+        async with self.slots:
+            conn = self.idle.pop() if self.idle else None
+            if conn is None:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+                conn = Connection(reader, writer)
+                self.opened += 1
+            try:
+                status = await asyncio.wait_for(conn.request(self.host, path, body, self.keep_alive), timeout)
+            except BaseException:
+                conn.close()
+                raise
+            if conn.reusable:
+                self.idle.append(conn)
+            else:
+                conn.close()
+            return status
+
+    def close(self):
+        while self.idle:
+            self.idle.pop().close()
+
+
+# Load generation
+class Window:
+    """Results of requests that completed inside one reporting interval."""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+        self.by_endpoint = Counter()
+
+    def summary(self, seconds: float) -> dict:
+        lat = np.asarray(self.latencies) * 1e3
+        total = len(lat) + sum(self.errors.values())
+        p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if len(lat) else (float("nan"),) * 3
+        return {
+            "completed": total,
+            "ok": len(lat),
+            "throughput_rps": round(len(lat) / seconds, 1),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(lat.max()), 2) if len(lat) else float("nan"),
+            "error_rate": round(sum(self.errors.values()) / total, 4) if total else 0.0,
+            "errors": dict(self.errors),
+            "by_endpoint": dict(self.by_endpoint),
+        }
+
+
+async def fire(pool, mix_item, scheduled: float, timeout: float, record):
+    label, path, body = mix_item
+    try:
+        status = await pool.request(path, body, timeout)
+        error = None if status == 200 else f"http_{status}"
+    except asyncio.TimeoutError:
+        error = "timeout"
+    except (OSError, asyncio.IncompleteReadError, ValueError, IndexError) as e:
+        error = type(e).__name__
+    record(label, time.perf_counter() - scheduled, error)
+
+
+async def run_step(pool, mix: RequestMix, rate: float, duration: float, args, rng) -> dict:
+    interval = args.interval
+    windows = {}
+    outstanding = set()
+    dropped = 0
+    start = time.perf_counter()
+
+    def record(label, latency, error):
+        window = windows.setdefault(int((time.perf_counter() - start) // interval), Window())
+        window.by_endpoint[label] += 1
+        if error:
+            window.errors[error] += 1
+        else:
+            window.latencies.append(latency)
+
+    shown = 0
+
+    def show_until(now: int):
+        nonlocal shown
+        while shown < now:
+            s = windows.get(shown, Window()).summary(interval)
+            print(f"  {rate:>7.0f} {(shown + 1) * interval:>6.1f} {s['throughput_rps']:>8.1f} "
+                  f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} "
+                  f"{s['error_rate']:>7.2%} {len(outstanding):>7}", flush=True)
+            shown += 1
+
+    async def reporter():
+        while True:
+            await asyncio.sleep(interval - ((time.perf_counter() - start) % interval) + 0.01)
+            show_until(int((time.perf_counter() - start) // interval))
+
+    report_task = asyncio.create_task(reporter())
+    sent = 0
+    next_at = start
+    end = start + duration
+    while next_at < end:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(outstanding) >= args.max_outstanding:
+            dropped += 1
+        else:
+            task = asyncio.create_task(fire(pool, mix.next(), next_at, args.timeout, record))
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+            sent += 1
+        gap = rng.expovariate(rate) if args.arrival == "poisson" else 1.0 / rate
+        next_at += gap
+
+    # Let in-flight requests finish (bounded by the request timeout)
+    if outstanding:
+        await asyncio.wait(set(outstanding), timeout=args.timeout + 1)
+    report_task.cancel()
+    elapsed = time.perf_counter() - start
+    show_until(max(windows, default=-1) + 1)
+
+    total = Window()
+    for w in windows.values():
+        total.latencies.extend(w.latencies)
+        total.errors.update(w.errors)
+        total.by_endpoint.update(w.by_endpoint)
+    if dropped:
+        total.errors["client_overload"] += dropped
+
+    return {
+        "target_rps": rate,
+        "duration_s": duration,
+        "sent": sent,
+        "achieved_send_rps": round(sent / duration, 1),
+        **total.summary(elapsed),
+        "timeline": [
+            {"t": round((i + 1) * interval, 2), **windows[i].summary(interval)} for i in sorted(windows)
+        ],
+    }
+
+
+async def run_load(host: str, port: int, mix: RequestMix, args) -> list:
+    pool = ConnectionPool(host, port, args.connections, keep_alive=not args.no_keepalive)
+    rng = random.Random(args.seed)
+    steps = []
+    try:
+        print(f"  {'rate':>7} {'t':>6} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'queued':>7}")
+        for rate in args.rates:
+            steps.append(await run_step(pool, mix, rate, args.duration, args, rng))
+    finally:
+        pool.close()
+    print(f"  {pool.opened} connections opened")
+    return steps
+
+
+# Local server
+def start_server(args) -> tuple:
+    port = free_port()
+    env = dict(
+        os.environ, port=str(port), HOST="127.0.0.1", WORKERS=str(args.workers), PRELOAD_MODEL="true",
+        BATCH_WINDOW_MS=str(args.batch_window_ms), PREDICT_CACHE_SIZE=str(args.cache_size),
+    )
+    # Admission control: server defaults unless set here (--max-concurrency 0 turns it off)
+    for name, value in (("ADMISSION_MAX_CONCURRENCY", args.max_concurrency), ("ADMISSION_QUEUE_SIZE", args.queue_size),
+                        ("ADMISSION_MAX_WAIT_MS", args.max_wait_ms), ("REQUEST_TIMEOUT_MS", args.request_timeout_ms)):
+        if value is not None:
+            env[name] = str(value)
+    server = subprocess.Popen(
+        [sys.executable, "inference.py"], cwd=DEPLOY_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready("127.0.0.1", port)
+    except RuntimeError:
+        server.terminate()
+        raise
+    return server, port
+
+
+def print_summary(steps: list):
+    print(f"\n{'target':>7} {'sent/s':>8} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>9} {'errors':>7}")
+    for s in steps:
+        print(f"{s['target_rps']:>7.0f} {s['achieved_send_rps']:>8.1f} {s['throughput_rps']:>8.1f} "
+              f"{s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>9.2f} {s['error_rate']:>7.2%}")
+        if s["errors"]:
+            print(f"{'':>7} errors: {s['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="existing server to target (default: start inference.py locally)")
+    parser.add_argument("--rates", type=float, nargs="+", default=[50.0], help="target requests/sec, one step each")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per rate step")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--mix", nargs="+", default=["cleaned=1", "agent=1"], help="source=weight pairs")
+    parser.add_argument("--payloads", type=int, default=5000, help="payloads sampled per source")
+    parser.add_argument("--batch-fraction", type=float, default=0.0, help="share of requests sent to /predict/batch")
+    parser.add_argument("--batch-size", type=int, default=50, help="rows per /predict/batch request")
+    parser.add_argument("--connections", type=int, default=64, help="max concurrent connections")
+    parser.add_argument("--no-keepalive", action="store_true", help="open a new connection per request")
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-outstanding", type=int, default=10000, help="requests queued client-side before dropping")
+    parser.add_argument("--interval", type=float, default=1.0, help="reporting interval in seconds")
+    parser.add_argument("--workers", type=int, default=1, help="WORKERS for the local server")
+    parser.add_argument("--batch-window-ms", type=float, default=0.0, help="BATCH_WINDOW_MS for the local server")
+    parser.add_argument("--cache-size", type=int, default=0, help="PREDICT_CACHE_SIZE for the local server")
+    parser.add_argument("--max-concurrency", type=int, help="ADMISSION_MAX_CONCURRENCY for the local server")
+    parser.add_argument("--queue-size", type=int, help="ADMISSION_QUEUE_SIZE for the local server")
+    parser.add_argument("--max-wait-ms", type=float, help="ADMISSION_MAX_WAIT_MS for the local server")
+    parser.add_argument("--request-timeout-ms", type=float, help="REQUEST_TIMEOUT_MS for the local server")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON here")
+    args = parser.parse_args()
+
+    mix = RequestMix(parse_mix(args.mix), args.payloads, args.batch_fraction, args.batch_size, args.seed)
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        server, port = start_server(args)
+        host = "127.0.0.1"
+        print(f"Started inference.py on port {port} with {args.workers} worker(s)")
+
+    try:
+        steps = asyncio.run(run_load(host, port, mix, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print_summary(steps)
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k != "output"}
+        with open(args.output, "w") as f:
+            json.dump({"config": config, "cpus": os.cpu_count(), "steps": steps}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
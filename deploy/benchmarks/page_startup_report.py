@@ -0,0 +1,117 @@
+# benchmarks/page_startup_report.py
+"""
+Cold-start import cost of the Streamlit page scripts, with an enforceable budget.
+
+For each page, the imports every run pays for (unconditional module-level
+`import` / `from ... import` statements, in order) are executed in a fresh
+interpreter under `python -X importtime`. The report gives the wall time of
+those imports and the heaviest top-level modules behind it. Imports inside
+functions or conditional branches are deliberately left out: they are only
+paid on the code paths that need them.
+
+Exits non-zero when a page exceeds --budget-ms or any of its imports fails
+(a failed import is reported and the rest still timed), so it can gate CI
+on a fresh container.
+
+Run from deploy/:  python benchmarks/page_startup_report.py [--budget-ms 1500] [--top 5] [--json] [page ...]
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PAGES = ["Home.py", "pages/1_Listings.py", "pages/2_Find_Agent.py", "pages/4_Predict.py"]
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+namespace, errors = {}, []
+t0 = time.perf_counter()
+for statement in json.loads(sys.argv[2]):
+    try:
+        exec(statement, namespace)
+    except Exception as e:
+        errors.append(f"{statement}: {type(e).__name__}: {e}")
+print(json.dumps({"import_ms": (time.perf_counter() - t0) * 1000.0, "errors": errors}))
+"""
+
+
+def page_imports(path: str) -> list:
+    """The page's unconditional module-level import statements, as source."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+
+def heaviest_modules(importtime_log: str, baseline: set, top: int) -> list:
+    """Top-level modules by cumulative import time, from -X importtime output."""
+    costs = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit() or name.startswith("  "):
+            continue  # header line, or a module pulled in by another one
+        name = name.strip()
+        if name not in baseline:
+            costs[name] = costs.get(name, 0) + int(cumulative) / 1000.0
+    return sorted(costs.items(), key=lambda kv: -kv[1])[:top]
+
+
+def run_child(statements: list) -> tuple:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, DEPLOY_DIR, json.dumps(statements)],
+        capture_output=True, text=True, cwd=DEPLOY_DIR, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return {"import_ms": float("nan"), "errors": proc.stderr.strip().splitlines()[-1:]}, proc.stderr
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def profile_page(page: str, top: int, baseline: set) -> dict:
+    result, log = run_child(page_imports(os.path.join(DEPLOY_DIR, page)))
+    return {
+        "page": page,
+        "import_ms": round(result["import_ms"], 1),
+        "errors": result["errors"],
+        "heaviest": [{"module": m, "ms": round(ms, 1)} for m, ms in heaviest_modules(log, baseline, top)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", default=DEFAULT_PAGES, help="page scripts, relative to deploy/")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("PAGE_IMPORT_BUDGET_MS", 1500)),
+                        help="maximum import time per page (default $PAGE_IMPORT_BUDGET_MS or 1500)")
+    parser.add_argument("--top", type=int, default=5, help="heaviest modules listed per page")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # Modules the bare interpreter imports anyway aren't the page's cost
+    _, log = run_child([])
+    baseline = {name for name, _ in heaviest_modules(log, set(), top=10 ** 6)}
+
+    results = [profile_page(page, args.top, baseline) for page in args.pages]
+    for r in results:
+        r["within_budget"] = not r["errors"] and r["import_ms"] <= args.budget_ms
+
+    if args.json:
+        print(json.dumps({"budget_ms": args.budget_ms, "pages": results}, indent=2))
+    else:
+        print(f"Page import time (fresh interpreter, budget {args.budget_ms:.0f} ms)\n")
+        for r in results:
+            status = "FAIL" if r["errors"] else ("ok" if r["within_budget"] else "OVER")
+            print(f"{r['page']:<24} {r['import_ms']:>8.1f} ms  {status}")
+            for error in r["errors"]:
+                print(f"    ! {error}")
+            for m in r["heaviest"]:
+                print(f"    {m['module']:<28} {m['ms']:>8.1f} ms")
+
+    sys.exit(0 if all(r["within_budget"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
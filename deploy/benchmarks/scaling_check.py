@@ -0,0 +1,102 @@
+# benchmarks/scaling_check.py
+"""
+Local check that /predict throughput scales with the number of workers.
+
+For each worker count, starts inference.py with WORKERS=<n> on a free
+port, saturates it with closed-loop keep-alive clients for a fixed
+duration and reports requests/sec, speedup over one worker and scaling
+efficiency (speedup / workers). The result cache is disabled so every
+request runs the forest. Client processes share the box with the
+server, so keep worker counts at or below half the cores for a fair read.
+Latency at fixed arrival rates is measured by benchmarks/loadgen.py.
+
+Run from deploy/:  python benchmarks/scaling_check.py --workers 1 2 4 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
+
+from lib.streaming import extract_records  # noqa: E402
+from local_server import free_port, wait_ready  # noqa: E402
+
+DATA_PATH = os.path.join(DEPLOY_DIR, "..", "model", "cleaned_data.csv")
+
+
+def load_payloads(n: int) -> list:
+    data = pd.read_csv(DATA_PATH, nrows=n)
+    return [json.dumps(record) for record in extract_records(data.to_dict("records"))]
+
+
+def client_loop(args) -> tuple:
+    port, payloads, offset, duration = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    done = errors = 0
+    i = offset
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        conn.request("POST", "/predict", body=payloads[i % len(payloads)], headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            done += 1
+        else:
+            errors += 1
+        i += 1
+    conn.close()
+    return done, errors
+
+
+def measure(n_workers: int, clients: int, duration: float, payloads: list) -> dict:
+    port = free_port()
+    env = dict(os.environ, WORKERS=str(n_workers), port=str(port), PREDICT_CACHE_SIZE="0", PRELOAD_MODEL="true")
+    server = subprocess.Popen(
+        [sys.executable, "inference.py"], cwd=DEPLOY_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready("127.0.0.1", port)
+        # Warm every worker before timing
+        with multiprocessing.Pool(clients) as pool:
+            pool.map(client_loop, [(port, payloads, i * 97, 1.0) for i in range(clients)])
+            results = pool.map(client_loop, [(port, payloads, i * 97, duration) for i in range(clients)])
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    done = sum(r[0] for r in results)
+    return {"workers": n_workers, "rps": done / duration, "errors": sum(r[1] for r in results)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to test")
+    parser.add_argument("--clients", type=int, default=0, help="concurrent clients (default: 4 x max workers)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    clients = args.clients or 4 * max(args.workers)
+    payloads = load_payloads(5000)
+    print(f"{os.cpu_count()} CPUs, {clients} clients, {args.duration:.0f}s per run")
+
+    baseline = None
+    print(f"{'workers':>7} {'req/s':>9} {'speedup':>8} {'efficiency':>10} {'errors':>7}")
+    for n in args.workers:
+        r = measure(n, clients, args.duration, payloads)
+        baseline = baseline or r["rps"] / n
+        speedup = r["rps"] / baseline
+        print(f"{n:>7} {r['rps']:>9.1f} {speedup:>8.2f} {speedup / n:>10.0%} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
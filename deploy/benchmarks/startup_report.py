@@ -0,0 +1,103 @@
+# benchmarks/startup_report.py
+"""
+Cold-start time and RSS of the pricing API, lazy vs eager artifact loading.
+
+Each scenario runs in a fresh interpreter:
+  lazy   - import inference.py as shipped (nothing loaded until first use)
+  eager  - import, then load every artifact the way the API used to at
+           import time (pickled model kept alive, SHAP explainer, fully
+           read tree predictions, reference averages)
+
+For each it reports import time, time to the first /predict result and
+RSS after import / after the first prediction / peak.
+
+Run from deploy/:  python benchmarks/startup_report.py [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, resource, sys, time
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+scenario = sys.argv[1]
+t0 = time.perf_counter()
+import inference
+t_import = time.perf_counter() - t0
+rss_import = rss_mb()
+
+keep = []
+if scenario == "eager":
+    import os, pickle
+    import numpy as np
+    model_dir = os.path.join(inference.BASE_DIR, "..", "model")
+    with open(inference.MODEL_PATH, "rb") as f:
+        keep.append(pickle.load(f))
+    keep.append(inference.get_explainer())
+    keep.append(np.load(os.path.join(model_dir, "rf_tree_predictions.npy")))
+    with open(os.path.join(model_dir, "reference_averages.json")) as f:
+        keep.append(json.load(f))
+    inference.warm_up()
+t_ready = time.perf_counter() - t0
+
+request = inference.PricingRequest(
+    square_footage=1600, bedrooms=3, bathrooms=2, latitude=30.37, longitude=-97.70,
+    city="Austin", state="TX", zipcode="78758", propertytype="Condo", listed_date="2025-12-01",
+)
+t1 = time.perf_counter()
+inference.score_requests([request])
+t_first = time.perf_counter() - t1
+
+print(json.dumps({
+    "scenario": scenario,
+    "import_s": round(t_import, 3),
+    "ready_s": round(t_ready, 3),
+    "first_predict_s": round(t_first, 3),
+    "rss_after_import_mb": round(rss_import, 1),
+    "rss_after_first_predict_mb": round(rss_mb(), 1),
+    "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+}))
+"""
+
+
+def run_scenario(name: str) -> dict:
+    env = dict(os.environ, PRELOAD_MODEL="false", PREDICT_CACHE_SIZE="0")
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, name],
+        cwd=DEPLOY_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = [run_scenario(name) for name in ("lazy", "eager")]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = f"{'scenario':<8} {'import s':>9} {'ready s':>8} {'1st pred s':>11} {'RSS import MB':>14} {'RSS 1st MB':>11} {'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<8} {r['import_s']:>9.3f} {r['ready_s']:>8.3f} {r['first_predict_s']:>11.3f} "
+              f"{r['rss_after_import_mb']:>14.1f} {r['rss_after_first_predict_mb']:>11.1f} {r['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
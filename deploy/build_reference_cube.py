@@ -0,0 +1,43 @@
+"""
+Build the hierarchical market reference cube from the cleaned listings.
+
+    python build_reference_cube.py [--min-count 5]
+
+train.ipynb writes model/reference_cube.json next to
+reference_averages.json; this rebuilds it from model/cleaned_data.csv
+without rerunning the notebook. Each level (ZIP x type x bedroom band,
+ZIP x type, ZIP, city, state) keeps count, median and mean PRICE for
+cells with at least --min-count listings.
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from lib.reference import LEVELS, build_reference_cube
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "model")
+DATA_PATH = os.path.join(MODEL_DIR, "cleaned_data.csv")
+REF_CUBE_PATH = os.path.join(MODEL_DIR, "reference_cube.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-count", type=int, default=5, help="listings a cell needs to be kept")
+    parser.add_argument("--output", default=REF_CUBE_PATH)
+    args = parser.parse_args()
+
+    data = pd.read_csv(DATA_PATH, dtype={"ZIPCODE": str})
+    cube = build_reference_cube(data, min_count=args.min_count)
+    with open(args.output, "w") as f:
+        json.dump(cube, f, separators=(",", ":"))
+
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB) from {len(data):,} listings")
+    for level in LEVELS:
+        print(f"  {level:<14} {len(cube['cells'][level]):>6} cells")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Derive faster serving tiers from the tuned forest and profile them.
+
+    python build_tiers.py [--tolerance 0.02] [--fast-trees N --fast-depth D]
+
+Every candidate is a prefix of the forest's trees, optionally depth-capped
+(CompiledForest.subset). Each one is scored on the notebook's held-out rows
+for MAE against the true price and against the full forest, and timed on
+single-row and 1000-row batches. Unless pinned with --fast-trees and
+--fast-depth, the `fast` tier is the quickest single-row candidate whose
+MAE is within --tolerance of the full forest's.
+
+Writes model/randomforest_tuned_model.fast.forest and the profile
+model/forest_tiers.json, which inference.py reads to serve ?tier=fast.
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from calibrate_intervals import held_out_rows
+from lib.features import FeatureEncoder
+from lib.forest import CompiledForest
+from lib.streaming import extract_records
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "model")
+MODEL_PATH = os.path.join(MODEL_DIR, "randomforest_tuned_model.pkl")
+FOREST_PATH = os.path.join(MODEL_DIR, "randomforest_tuned_model.forest")
+SCHEMA_PATH = os.path.join(MODEL_DIR, "features_schema.json")
+FREQ_MAP_PATH = os.path.join(MODEL_DIR, "frequency_maps.json")
+TIERS_PATH = os.path.join(MODEL_DIR, "forest_tiers.json")
+
+TREE_COUNTS = (10, 25, 50, 100, 150)
+DEPTH_CAPS = (None, 18, 14, 10)
+
+
+def load_full_forest() -> CompiledForest:
+    if os.path.exists(FOREST_PATH):
+        return CompiledForest.load(FOREST_PATH, mmap=True)
+    with open(MODEL_PATH, "rb") as f:
+        return CompiledForest.from_sklearn(pickle.load(f))
+
+
+def held_out_features():
+    with open(SCHEMA_PATH, "r") as f:
+        feature_columns = json.load(f)
+    with open(FREQ_MAP_PATH, "r") as f:
+        freq_maps = json.load(f)
+
+    test = held_out_rows()
+    X = FeatureEncoder(feature_columns, freq_maps).encode(extract_records(test.to_dict("records")))
+    return X, test["PRICE"].to_numpy(dtype=np.float64)
+
+
+def serve_once(forest: CompiledForest, X: np.ndarray):
+    # What the API does per call: per-tree matrix, then mean and percentiles
+    tree_preds = forest.predict_trees(X)
+    return tree_preds.mean(axis=1), np.percentile(tree_preds, [5, 95], axis=1)
+
+
+def time_calls(fn, min_repeats: int, budget_s: float) -> np.ndarray:
+    fn()
+    timings = []
+    deadline = time.perf_counter() + budget_s
+    while len(timings) < min_repeats or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.asarray(timings)
+
+
+def profile(forest: CompiledForest, X, y, full_preds, budget_s: float) -> dict:
+    preds = forest.predict(X)
+    single = time_calls(lambda: serve_once(forest, X[:1]), 20, budget_s)
+    batch = time_calls(lambda: serve_once(forest, X[:1000]), 3, budget_s)
+    return {
+        "n_trees": forest.n_trees,
+        "n_nodes": forest.n_nodes,
+        "mae": round(float(np.mean(np.abs(preds - y))), 2),
+        "fidelity_mae": round(float(np.mean(np.abs(preds - full_preds))), 2),
+        "p50_ms_batch1": round(float(np.percentile(single, 50) * 1e3), 4),
+        "p99_ms_batch1": round(float(np.percentile(single, 99) * 1e3), 4),
+        "rows_per_sec_batch1000": round(len(X[:1000]) / float(np.median(batch)), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tolerance", type=float, default=0.02, help="allowed relative MAE increase for `fast`")
+    parser.add_argument("--fast-trees", type=int, help="pin the fast tier's tree count")
+    parser.add_argument("--fast-depth", type=int, help="pin the fast tier's depth cap")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds of timing per candidate and batch size")
+    args = parser.parse_args()
+
+    full = load_full_forest()
+    X, y = held_out_features()
+    full_preds = full.predict(X)
+    print(f"Full forest: {full.n_trees} trees, {full.n_nodes:,} nodes; {len(X)} held-out rows")
+
+    full_profile = {**profile(full, X, y, full_preds, args.budget), "max_depth": None}
+    print(f"{'trees':>6} {'depth':>6} {'nodes':>10} {'MAE':>8} {'vs full':>8} {'p50 ms':>8} {'rows/s@1k':>10}")
+
+    def show(p):
+        change = p["mae"] / full_profile["mae"] - 1
+        print(f"{p['n_trees']:>6} {str(p['max_depth']):>6} {p['n_nodes']:>10,} {p['mae']:>8.1f} "
+              f"{change:>+8.2%} {p['p50_ms_batch1']:>8.3f} {p['rows_per_sec_batch1000']:>10,.0f}")
+
+    show(full_profile)
+    if args.fast_trees or args.fast_depth:
+        grid = [(args.fast_trees or full.n_trees, args.fast_depth)]
+    else:
+        grid = [(n, d) for n in TREE_COUNTS if n < full.n_trees for d in DEPTH_CAPS]
+
+    candidates = []
+    for n_trees, max_depth in grid:
+        forest = full.subset(n_trees, max_depth)
+        p = {**profile(forest, X, y, full_preds, args.budget), "max_depth": max_depth}
+        candidates.append(p)
+        show(p)
+
+    if args.fast_trees or args.fast_depth:
+        fast = candidates[0]
+    else:
+        eligible = [p for p in candidates if p["mae"] <= full_profile["mae"] * (1 + args.tolerance)]
+        fast = min(eligible, key=lambda p: p["p50_ms_batch1"]) if eligible else full_profile
+
+    fast_path = os.path.join(MODEL_DIR, "randomforest_tuned_model.fast.forest")
+    full.subset(fast["n_trees"], fast["max_depth"]).save(fast_path)
+
+    tiers = {
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "eval_rows": int(len(X)),
+        "tolerance": args.tolerance,
+        "tiers": {
+            "full": {**full_profile, "path": os.path.basename(FOREST_PATH)},
+            "fast": {**fast, "path": os.path.basename(fast_path)},
+        },
+        "candidates": candidates,
+    }
+    tmp_path = TIERS_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(tiers, f, indent=2)
+    os.replace(tmp_path, TIERS_PATH)
+
+    speedup = full_profile["p50_ms_batch1"] / fast["p50_ms_batch1"]
+    print(f"\nfast tier: {fast['n_trees']} trees, max_depth={fast['max_depth']}, MAE {fast['mae']:.1f} "
+          f"vs {full_profile['mae']:.1f}, {speedup:.1f}x faster per single request")
+    print(f"Wrote {fast_path} and {TIERS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
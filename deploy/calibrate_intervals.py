@@ -0,0 +1,64 @@
+"""
+Build the split-conformal calibration artifact from existing training outputs.
+
+    python calibrate_intervals.py [--coverage 0.9] [--bands 3]
+
+train.ipynb writes model/conformal_calibration.json after tuning; this
+rebuilds it without retraining. The held-out rows are recovered by
+repeating the notebook's train_test_split(test_size=0.2, random_state=42)
+on model/cleaned_data.csv, and their point predictions are the row means
+of model/rf_tree_predictions.npy.
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from lib.conformal import build_calibration
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "model")
+DATA_PATH = os.path.join(MODEL_DIR, "cleaned_data.csv")
+TREE_PREDS_PATH = os.path.join(MODEL_DIR, "rf_tree_predictions.npy")
+CONFORMAL_PATH = os.path.join(MODEL_DIR, "conformal_calibration.json")
+
+
+def held_out_rows() -> pd.DataFrame:
+    """The notebook's test split of cleaned_data.csv, in the same order."""
+    data = pd.read_csv(DATA_PATH)
+    _, test_index = train_test_split(np.arange(len(data)), test_size=0.2, random_state=42)
+    return data.iloc[test_index].reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--coverage", type=float, default=0.9, help="target interval coverage")
+    parser.add_argument("--bands", type=int, default=3, help="predicted-price bands per property type")
+    parser.add_argument("--min-stratum-size", type=int, default=50, help="smaller strata fall back to coarser ones")
+    parser.add_argument("--output", default=CONFORMAL_PATH)
+    args = parser.parse_args()
+
+    test = held_out_rows()
+    tree_preds = np.load(TREE_PREDS_PATH, mmap_mode="r")
+    if len(tree_preds) != len(test):
+        raise SystemExit(f"{TREE_PREDS_PATH} has {len(tree_preds)} rows but the test split has {len(test)}")
+
+    calibration = build_calibration(
+        tree_preds.mean(axis=1), test["PRICE"], test["PROPERTYTYPE"],
+        coverage=args.coverage, n_bands=args.bands, min_stratum_size=args.min_stratum_size
+    )
+    with open(args.output, "w") as f:
+        json.dump(calibration, f, indent=2)
+
+    print(f"Wrote {args.output} from {calibration['n_calibration']} held-out rows")
+    print(f"  global half-width: {calibration['global']['q']:.0f}")
+    for key, entry in calibration["strata"].items():
+        note = f" (falls back to {entry['fallback']})" if "fallback" in entry else ""
+        print(f"  {key:<22} n={entry['n']:>5}  half-width={entry['q']:.0f}{note}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Export the tuned RandomForest to the compact memory-mappable forest format.
+
+    python export_forest.py [--float32] [--workers 4]
+
+Writes model/randomforest_tuned_model.forest, checks its per-tree
+predictions against the pickle on rows of model/cleaned_data.csv and
+reports per-worker memory when N processes serve the pickle vs the
+shared memory-mapped file.
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from lib.features import FeatureEncoder
+from lib.forest import CompiledForest
+from lib.streaming import extract_records
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "model")
+MODEL_PATH = os.path.join(MODEL_DIR, "randomforest_tuned_model.pkl")
+FOREST_PATH = os.path.join(MODEL_DIR, "randomforest_tuned_model.forest")
+SCHEMA_PATH = os.path.join(MODEL_DIR, "features_schema.json")
+FREQ_MAP_PATH = os.path.join(MODEL_DIR, "frequency_maps.json")
+DATA_PATH = os.path.join(MODEL_DIR, "cleaned_data.csv")
+
+
+def sample_features(n_rows: int) -> np.ndarray:
+    with open(SCHEMA_PATH, "r") as f:
+        feature_columns = json.load(f)
+    with open(FREQ_MAP_PATH, "r") as f:
+        freq_maps = json.load(f)
+
+    records = extract_records(pd.read_csv(DATA_PATH, nrows=n_rows).to_dict("records"))
+    return FeatureEncoder(feature_columns, freq_maps).encode(records)
+
+
+def parity_check(model, forest: CompiledForest, X: np.ndarray, exact: bool) -> bool:
+    expected = np.stack([tree.predict(X) for tree in model.estimators_], axis=1)
+    actual = forest.predict_trees(X)
+
+    # Compare what the API returns: mean and 5th/95th percentile, rounded to cents
+    def summary(tree_preds):
+        return np.round(np.stack([
+            tree_preds.mean(axis=1),
+            np.percentile(tree_preds, 5, axis=1),
+            np.percentile(tree_preds, 95, axis=1),
+        ], axis=1), 2)
+
+    max_abs = float(np.max(np.abs(expected - actual))) if X.size else 0.0
+    api_mismatch = int(np.sum(np.any(summary(expected) != summary(actual), axis=1)))
+
+    print(f"Parity on {len(X)} rows x {forest.n_trees} trees:")
+    print(f"  per-tree predictions identical : {np.array_equal(expected, actual)}")
+    print(f"  max abs per-tree difference    : {max_abs:.3g}")
+    print(f"  rows whose API output differs  : {api_mismatch}")
+
+    if exact:
+        return np.array_equal(expected, actual)
+    # float32 values: split decisions are exact, leaf values carry ~1e-7 relative error
+    return bool(np.allclose(expected, actual, rtol=1e-6, atol=0))
+
+
+WORKER = r"""
+import pickle, sys
+import numpy as np
+sys.path.insert(0, sys.argv[3])
+from lib.forest import CompiledForest
+
+mode, path = sys.argv[1], sys.argv[2]
+if mode == "pickle":
+    with open(path, "rb") as f:
+        forest = CompiledForest.from_sklearn(pickle.load(f))
+else:
+    forest = CompiledForest.load(path, mmap=True)
+
+# Touch every tree the way serving does
+forest.predict_trees(np.zeros((64, forest.n_features)))
+print("ready", flush=True)
+sys.stdin.read()
+"""
+
+
+def smaps_rollup(pid: int) -> dict:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0] in ("Rss:", "Pss:"):
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return fields
+
+
+def worker_memory(mode: str, path: str, n_workers: int) -> list:
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, mode, path, BASE_DIR],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+        for _ in range(n_workers)
+    ]
+    try:
+        for p in procs:
+            p.stdout.readline()
+        return [smaps_rollup(p.pid) for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+
+
+def report_workers(forest_path: str, n_workers: int):
+    print(f"\nMemory with {n_workers} workers (MB; PSS splits shared pages between processes):")
+    print(f"  {'source':<8} {'RSS/worker':>11} {'PSS/worker':>11} {'total PSS':>10}")
+    for mode, path in (("pickle", MODEL_PATH), ("mmap", forest_path)):
+        stats = worker_memory(mode, path, n_workers)
+        rss = np.mean([s["Rss"] for s in stats])
+        pss = np.mean([s["Pss"] for s in stats])
+        total = sum(s["Pss"] for s in stats)
+        print(f"  {mode:<8} {rss:>11.1f} {pss:>11.1f} {total:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=FOREST_PATH, help="compiled forest file to write")
+    parser.add_argument("--float32", action="store_true", help="store thresholds and leaf values as float32")
+    parser.add_argument("--parity-rows", type=int, default=2000, help="rows of cleaned_data.csv to check")
+    parser.add_argument("--workers", type=int, default=4, help="workers for the memory report (0 to skip)")
+    args = parser.parse_args()
+
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+
+    t0 = time.perf_counter()
+    CompiledForest.from_sklearn(model).save(args.output, float32=args.float32)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB, "
+          f"pickle {os.path.getsize(MODEL_PATH) / 1e6:.1f} MB) in {time.perf_counter() - t0:.1f}s")
+
+    forest = CompiledForest.load(args.output, mmap=True)
+    if not parity_check(model, forest, sample_features(args.parity_rows), exact=not args.float32):
+        os.remove(args.output)
+        raise SystemExit("Parity check failed; compiled forest removed")
+
+    del model
+    if args.workers > 0:
+        report_workers(args.output, args.workers)
+
+
+if __name__ == "__main__":
+    main()
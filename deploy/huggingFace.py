@@ -1,17 +1,54 @@
-from huggingface_hub import HfApi
-from dotenv import load_dotenv
+"""
+Publish the model artifacts to the Hugging Face Hub model repo.
+
+    python huggingFace.py [--dry-run] [--hub-dir DIR]
+
+Builds artifacts_manifest.json (sha256, size and mtime of every artifact in
+model/, plus the version they make up together) and pushes, in one commit,
+only the artifacts whose content differs from the hub's current manifest,
+together with the new manifest, and tags that commit artifacts-<version>
+so ARTIFACT_VERSION can pin it later. The Predict page fetches exactly the
+versions listed there. --hub-dir publishes to a local directory laid out
+like the repo instead (a stand-in hub for tests and offline setups).
+"""
+import argparse
 import os
 
+from dotenv import load_dotenv
+
+from lib.artifacts import HfHub, LocalHub, publish
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
+MODEL_DIR = os.path.join(BASE_DIR, "..", "model")
+REPO_ID = "Sidikat123/Centralised-Data-Platform-Model"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be uploaded, upload nothing")
+    parser.add_argument("--hub-dir", default=os.getenv("ARTIFACT_HUB_DIR"), help="publish to this directory instead")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    args = parser.parse_args()
+
+    load_dotenv()
+    hub = LocalHub(args.hub_dir) if args.hub_dir else HfHub(REPO_ID, token=os.getenv("HF_TOKEN"))
+
+    try:
+        summary = publish(hub, args.model_dir, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"Upload failed: {str(e)}")
+        raise SystemExit(1)
+
+    action = "Would upload" if args.dry_run else "Uploaded"
+    print(f"Artifact version {summary['version']} (hub had {summary['previous_version'] or 'no manifest'})")
+    if summary["uploaded"]:
+        print(f"  {action}: {', '.join(summary['uploaded'])}")
+    elif summary["version"] != summary["previous_version"]:
+        print(f"  {action}: manifest only")
+    else:
+        print("  Nothing to upload, hub is up to date")
+    print(f"  Unchanged: {', '.join(summary['unchanged']) or '-'}")
 
-load_dotenv
-api=HfApi(token=os.getenv("HF_TOKEN"))
 
-try:
-    api.upload_file(
-        path_or_fileobj="../model/randomforest_tuned_model.pkl",
-        path_in_repo="randomforest_tuned_model.pkl", 
-        repo_id="Sidikat123/Centralised-Data-Platform-Model", 
-        repo_type="model",
-    )
-except Exception as e:
-    print(f"Upload failed: {str(e)}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
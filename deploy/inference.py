@@ -1,64 +1,189 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-import pandas as pd
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import List, Literal, Optional, Union
+from contextlib import asynccontextmanager
 import numpy as np
-import pickle
+import functools
+import threading
+import asyncio
+import signal
+import hmac
 import json
+import time
 import os
 import uvicorn
 from datetime import date
 from dotenv import load_dotenv
+from lib.forest import CompiledForest
+from lib.admission import AdmissionController, DeadlineExceeded, Overloaded, Rejected
+from lib.batcher import MicroBatcher
+from lib.bundle import BundleManager, ModelBundle, load_bundle, load_shap_explainer
+from lib.cache import PredictionCache, row_keys
+from lib.comps import CompsIndex
+from lib.conformal import ConformalIntervals
+from lib.features import FeatureEncoder
+from lib.reference import ReferenceCube
+from lib import scoring
+from lib.streaming import DuplexStreamingResponse, StreamError, iter_records, stream_format
+from lib import prefork
+from lib.metrics import Registry, HttpMetrics, MetricsMiddleware, Counter, Gauge, SIZE_BUCKETS
 
 load_dotenv()
 
-app = FastAPI(
-    title="AlloyTower Real Estate Pricing API",
-    version="1.0"
-)
-
-# Load model and feature schema ONCE
+# Artifact locations
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # deploy/
 MODEL_PATH = os.path.join(BASE_DIR, "..", "model", "randomforest_tuned_model.pkl")
+# Compact export of MODEL_PATH (see export_forest.py); preferred when present
+FOREST_PATH = os.getenv("FOREST_PATH", os.path.join(BASE_DIR, "..", "model", "randomforest_tuned_model.forest"))
 SCHEMA_PATH = os.path.join(BASE_DIR, "..", "model", "features_schema.json")
 FREQ_MAP_PATH = os.path.join(BASE_DIR, "..", "model", "frequency_maps.json")  # must be saved during training
 SHAP_EXPLAINER_PATH = os.path.join(BASE_DIR, "..", "model", "shap_explainer.pkl")
-TREE_PREDS_PATH = os.path.join(BASE_DIR, "..", "model", "rf_tree_predictions.npy")
-REF_PATH = os.path.join(BASE_DIR, "..", "model", "reference_averages.json")
+# Hierarchical reference prices (train.ipynb or build_reference_cube.py)
+REF_CUBE_PATH = os.path.join(BASE_DIR, "..", "model", "reference_cube.json")
+# Listings searched by /comps
+COMPS_DATA_PATH = os.getenv("COMPS_DATA_PATH", os.path.join(BASE_DIR, "..", "model", "cleaned_data.csv"))
+# Split-conformal interval calibration (train.ipynb or calibrate_intervals.py)
+CONFORMAL_PATH = os.path.join(BASE_DIR, "..", "model", "conformal_calibration.json")
+# Smaller serving variants of the forest and their MAE/latency profile (build_tiers.py)
+TIERS_PATH = os.path.join(BASE_DIR, "..", "model", "forest_tiers.json")
 
+# Load the serving artifacts at startup instead of on the first request
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "false").lower() == "true"
 
-if not os.path.exists(MODEL_PATH):
+# Seconds between checks of the model files for a new version (0 = only reload on demand)
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))
+# Required by POST /admin/reload in the X-Admin-Token header; unset disables the endpoint
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Required artifacts must exist, but nothing is read until first use
+if not (os.path.exists(FOREST_PATH) or os.path.exists(MODEL_PATH)):
     raise RuntimeError("Model file not found")
 
-with open(MODEL_PATH, "rb") as f:
-    model = pickle.load(f)
+for required_path in (SCHEMA_PATH, FREQ_MAP_PATH):
+    if not os.path.exists(required_path):
+        raise RuntimeError(f"Required artifact not found: {os.path.basename(required_path)}")
+
+def lazy_artifact(loader):
+    """Load an artifact on first call and keep it; concurrent first calls load once."""
+    lock = threading.Lock()
+    loaded = {}
+
+    @functools.wraps(loader)
+    def get():
+        if "value" not in loaded:
+            with lock:
+                if "value" not in loaded:
+                    loaded["value"] = loader()
+        return loaded["value"]
+
+    get.is_loaded = lambda: "value" in loaded
+    return get
+
+def load_explainer():
+    # Optional: a missing or unreadable explainer yields None instead of failing
+    return load_shap_explainer(SHAP_EXPLAINER_PATH, MODEL_PATH)
+
+def load_model_bundle() -> ModelBundle:
+    """Forest (memory-mapped when exported), tiers, encoder and calibration, validated together."""
+    return load_bundle(
+        {
+            "model": MODEL_PATH,
+            "forest": FOREST_PATH,
+            "schema": SCHEMA_PATH,
+            "freq_maps": FREQ_MAP_PATH,
+            "tiers": TIERS_PATH,
+            "conformal": CONFORMAL_PATH,
+            "explainer": SHAP_EXPLAINER_PATH,
+        },
+        load_explainer
+    )
+
+# The live artifact set; loaded on first use and swapped whole on reload
+model_bundle = BundleManager(load_model_bundle)
+
+def current_bundle() -> ModelBundle:
+    return model_bundle.current()
+
+async def request_bundle() -> ModelBundle:
+    """The bundle a request runs on; the first load happens off the event loop."""
+    if model_bundle.is_loaded():
+        return current_bundle()
+    return await run_in_threadpool(current_bundle)
+
+def get_forest() -> CompiledForest:
+    return current_bundle().forest
+
+def get_encoder() -> FeatureEncoder:
+    return current_bundle().encoder
 
-# Load feature schema
-with open(SCHEMA_PATH, "r") as f:
-    FEATURE_COLUMNS = json.load(f)
+def get_conformal() -> Optional[ConformalIntervals]:
+    return current_bundle().conformal
 
-# Load frequency maps 
-with open(FREQ_MAP_PATH, "r") as f:
-    FREQ_MAPS = json.load(f)
+def get_explainer():
+    return current_bundle().explainer()
 
-# Load SHAP explainer 
-if not os.path.exists(SHAP_EXPLAINER_PATH):
-    raise RuntimeError("SHAP explainer file not found")
+# Optional artifacts outside the bundle: missing files yield None
+@lazy_artifact
+def get_reference_cube() -> Optional[ReferenceCube]:
+    if not os.path.exists(REF_CUBE_PATH):
+        return None
+    return ReferenceCube.load(REF_CUBE_PATH)
 
-with open(SHAP_EXPLAINER_PATH, "rb") as f:
-    explainer = pickle.load(f)
+@lazy_artifact
+def get_comps_index() -> Optional[CompsIndex]:
+    if not os.path.exists(COMPS_DATA_PATH):
+        return None
+    # One KD-tree per property type and bedroom band, built once
+    return CompsIndex.from_csv(COMPS_DATA_PATH)
 
-# Load Tree-Level Predictions for Interval Estimation 
-if not os.path.exists(TREE_PREDS_PATH):
-    raise RuntimeError("Tree predictions file not found. Cannot compute prediction intervals.")
+def warm_up():
+    """Load everything the /predict, /comps and /reference paths need."""
+    current_bundle()
+    get_comps_index()
+    get_reference_cube()
 
-all_tree_preds = np.load(TREE_PREDS_PATH)  # shape: (n_samples_test, n_trees)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if PRELOAD_MODEL:
+        await run_in_threadpool(warm_up)
+    # A worker forked (or restarted) after the files changed must not serve the parent's stale copy
+    if model_bundle.changed_on_disk():
+        try:
+            await run_in_threadpool(model_bundle.reload)
+        except Exception as e:
+            print(f"Model reload failed, still serving the previous bundle: {e}")
+    if MODEL_WATCH_INTERVAL > 0:
+        model_bundle.watch(MODEL_WATCH_INTERVAL)
+    # SIGHUP reloads the artifacts (the prefork parent forwards it to every worker)
+    if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, model_bundle.reload_in_background)
+    yield
 
-# Load reference averages (ZIPCODE and PROPERTYTYPE)
-if not os.path.exists(REF_PATH):
-    raise RuntimeError("reference_averages.json not found")
+app = FastAPI(
+    title="AlloyTower Real Estate Pricing API",
+    version="1.0",
+    lifespan=lifespan
+)
+
+# Metrics (Prometheus text format on /metrics)
+metrics = Registry()
+STAGE_SECONDS = metrics.histogram(
+    "pricing_api_stage_duration_seconds", "Time spent in each inference stage.", ("stage",))
+BATCH_ROWS = metrics.histogram(
+    "pricing_api_scored_rows", "Rows per scoring call, before the result cache.", buckets=SIZE_BUCKETS)
+FOREST_ROWS = metrics.histogram(
+    "pricing_api_forest_rows", "Rows per forest evaluation, after the result cache.", buckets=SIZE_BUCKETS)
+FAILURES = metrics.counter(
+    "pricing_api_failures_total", "Exceptions turned into HTTP 500 responses.", ("endpoint", "exception"))
 
-with open(REF_PATH, "r") as f:
-    reference_averages = json.load(f)
+app.add_middleware(
+    MetricsMiddleware,
+    metrics=HttpMetrics(metrics, "pricing_api"),
+    routes=lambda: [route.path for route in app.routes]
+)
 
 # Request Schema
 class PricingRequest(BaseModel):
@@ -73,74 +198,587 @@ class PricingRequest(BaseModel):
     propertytype: str
     listed_date: date
 
+# Reference-price query; a full PricingRequest payload is accepted as-is
+class ReferenceRequest(BaseModel):
+    zipcode: str
+    propertytype: str
+    bedrooms: int
+    city: str
+    state: str
+
+ReferenceLevel = Literal["zip_type_beds", "zip_type", "zip", "city", "state"]
+
+# Comparable-listings query; a full PricingRequest payload is accepted as-is
+class CompsRequest(BaseModel):
+    latitude: float
+    longitude: float
+    propertytype: str
+    bedrooms: int
+
+# Maximum number of listings accepted by /predict/batch in one call
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 10000))
+
+# Micro-batching of concurrent /predict calls (opt-in: set BATCH_WINDOW_MS > 0)
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", 0))
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", 64))
+
+# Result cache keyed on the encoded feature vector (PREDICT_CACHE_SIZE=0 disables)
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", 10000))
+PREDICT_CACHE_TTL = float(os.getenv("PREDICT_CACHE_TTL", 3600))
+
+# Interval method when a request doesn't pick one: per-tree percentiles ("trees")
+# or calibrated half-widths around the point prediction ("conformal")
+INTERVAL_MODE = os.getenv("INTERVAL_MODE", "trees")
+IntervalMode = Literal["trees", "conformal"]
+
+# Forest tier when a request doesn't pick one: "full" or a faster variant such as "fast"
+DEFAULT_TIER = os.getenv("DEFAULT_TIER", "full")
+Tier = Literal["fast", "full"]
+
+# Admission control for scoring work: concurrent forest evaluations, how many more may
+# wait for a slot and for how long before being shed with 503 (ADMISSION_MAX_CONCURRENCY=0 disables)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", os.cpu_count() or 1))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", 64))
+ADMISSION_MAX_WAIT_MS = float(os.getenv("ADMISSION_MAX_WAIT_MS", 1000))
+
+# Deadline for requests that don't send X-Request-Timeout-Ms (0 = none)
+REQUEST_TIMEOUT_MS = float(os.getenv("REQUEST_TIMEOUT_MS", 0))
+
+# Rows scored per forest pass by /predict/stream; bounds its memory per upload
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", 1000))
+
+# Comparables returned per query at most, and batches up to this size are answered on the event loop
+MAX_COMPS = int(os.getenv("MAX_COMPS", 50))
+COMPS_INLINE_BATCH = 64
+
+# SHAP is far costlier than a prediction: smaller batches, own cache
+MAX_EXPLAIN_BATCH_SIZE = int(os.getenv("MAX_EXPLAIN_BATCH_SIZE", 100))
+EXPLAIN_CACHE_SIZE = int(os.getenv("EXPLAIN_CACHE_SIZE", 5000))
+
 # Feature Engineering
-def prepare_features(request: PricingRequest) -> pd.DataFrame:
-    df = pd.DataFrame([{
-        "SQUAREFOOTAGE": request.square_footage,
-        "BEDROOMS": request.bedrooms,
-        "BATHROOMS": request.bathrooms,
-        "LATITUDE": request.latitude,
-        "LONGITUDE": request.longitude,
-        "CITY": request.city,
-        "STATE": request.state,
-        "ZIPCODE": request.zipcode,
-        "PROPERTYTYPE": request.propertytype,
-        "LISTEDDATE": pd.to_datetime(request.listed_date)
-    }])
-
-    # Date Features
-    df["LISTING_YEAR"] = df["LISTEDDATE"].dt.year
-    df["LISTING_MONTH"] = df["LISTEDDATE"].dt.month
-    df["LISTING_DAY"] = df["LISTEDDATE"].dt.day
-    df.drop(columns=["LISTEDDATE"], inplace=True)
-
-    # Frequency Encoding (ZIP / CITY / STATE)
-    for col in ["ZIPCODE", "CITY", "STATE"]:
-        freq_map = FREQ_MAPS.get(col, {})
-        df[col] = df[col].map(freq_map).fillna(0)
-
-    # One-Hot Encoding PROPERTYTYPE
-    for col in FEATURE_COLUMNS:
-        if col.startswith("PROPERTYTYPE_"):
-            df[col] = 0
-
-    prop_col = f"PROPERTYTYPE_{request.propertytype}"
-    if prop_col in df.columns:
-        df[prop_col] = 1
-
-    # Align columns exactly to training schema
-    df = df.reindex(columns=FEATURE_COLUMNS, fill_value=0)
-
-    return df
+def prepare_features_batch(requests: List[PricingRequest], bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    return (bundle or current_bundle()).encoder.encode(requests)
+
+# Forest Evaluation
+def predict_trees(X: np.ndarray, tier: str = "full", bundle: Optional[ModelBundle] = None) -> np.ndarray:
+    """Per-tree predictions for every row, shape (n_rows, n_trees)."""
+    return (bundle or current_bundle()).tier_forest(tier).predict_trees(X)
+
+prediction_cache = (
+    PredictionCache(
+        PREDICT_CACHE_SIZE,
+        PREDICT_CACHE_TTL
+    )
+    if PREDICT_CACHE_SIZE > 0 else None
+)
+
+def evaluate_rows(
+    X: np.ndarray, requests: List[PricingRequest], interval: str = "trees", tier: str = "full",
+    bundle: Optional[ModelBundle] = None
+) -> List[dict]:
+    """Forest pass plus interval computation, each timed as its own stage."""
+    FOREST_ROWS.observe(len(X))
+    return scoring.predict_rows(
+        bundle or current_bundle(), X, [r.propertytype for r in requests], interval, tier,
+        stage=lambda name: STAGE_SECONDS.time(stage=name)
+    )
+
+def resolve_tier(tier: Optional[str], bundle: Optional[ModelBundle] = None) -> str:
+    """Requested or default tier; tiers that weren't built are served by the full forest."""
+    return scoring.resolve_tier(bundle or current_bundle(), tier, DEFAULT_TIER)
+
+def score_requests(
+    requests: List[PricingRequest], interval: Optional[str] = None, tier: Optional[str] = None,
+    bundle: Optional[ModelBundle] = None
+) -> List[dict]:
+    """Encode, evaluate and summarize a list of requests in one forest pass."""
+    # One bundle for the whole call, even if a reload swaps in another meanwhile
+    bundle = bundle or current_bundle()
+    interval = interval or INTERVAL_MODE
+    tier = resolve_tier(tier, bundle)
+    BATCH_ROWS.observe(len(requests))
+    with STAGE_SECONDS.time(stage="encode"):
+        X = prepare_features_batch(requests, bundle)
+    if prediction_cache is None:
+        return evaluate_rows(X, requests, interval, tier, bundle)
+
+    # Canonical key: the exact float64 feature row the forest would see, plus interval
+    # method, tier and model version (entries from a replaced bundle just age out)
+    with STAGE_SECONDS.time(stage="cache_lookup"):
+        keys = row_keys(X, interval, tier, bundle.version)
+        results = prediction_cache.get_many(keys)
+
+    # Only rows that missed the cache go through the forest
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        computed = evaluate_rows(X[missing], [requests[i] for i in missing], interval, tier, bundle)
+        prediction_cache.put_many([keys[i] for i in missing], computed)
+        for i, r in zip(missing, computed):
+            results[i] = r
+
+    return results
+
+def dumps(payload) -> str:
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def json_response(payload, headers: Optional[dict] = None) -> Response:
+    """Serialize explicitly so the time spent on JSON is measured too."""
+    with STAGE_SECONDS.time(stage="serialize"):
+        body = dumps(payload).encode("utf-8")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def score_mixed(items: List[tuple]) -> List[dict]:
+    """Score (request, interval, tier, bundle) items, one forest pass per distinct option set."""
+    results = [None] * len(items)
+    for options in {item[1:] for item in items}:
+        idx = [i for i, item in enumerate(items) if item[1:] == options]
+        for i, result in zip(idx, score_requests([items[i][0] for i in idx], *options)):
+            results[i] = result
+    return results
+
+admission = (
+    AdmissionController(ADMISSION_MAX_CONCURRENCY, ADMISSION_QUEUE_SIZE, ADMISSION_MAX_WAIT_MS / 1000.0)
+    if ADMISSION_MAX_CONCURRENCY > 0 else None
+)
+
+def request_deadline(timeout_ms: Optional[float]) -> Optional[float]:
+    """time.monotonic() by which a request must be scored, from its header or the default."""
+    timeout_ms = timeout_ms if timeout_ms is not None else REQUEST_TIMEOUT_MS
+    return time.monotonic() + timeout_ms / 1000.0 if timeout_ms and timeout_ms > 0 else None
+
+async def run_scoring(fn, *args, deadline: Optional[float] = None, shed: bool = True):
+    """Run CPU-bound scoring on the thread pool once admission control grants a slot."""
+    if admission is None:
+        if deadline is None:
+            return await run_in_threadpool(fn, *args)
+        # No queue to wait in, but the caller's deadline still holds
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        try:
+            return await asyncio.wait_for(run_in_threadpool(fn, *args), remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded()
+    queued_at = time.perf_counter()
+    async with admission.slot(deadline, shed):
+        STAGE_SECONDS.observe(time.perf_counter() - queued_at, stage="queue")
+        return await run_in_threadpool(fn, *args)
+
+batcher = (
+    MicroBatcher(
+        score_mixed, window_ms=BATCH_WINDOW_MS, max_batch_size=BATCH_MAX_SIZE,
+        # Callers were admitted individually; their coalesced pass waits for a slot
+        gate=(lambda: admission.slot(shed=False)) if admission is not None else None
+    )
+    if BATCH_WINDOW_MS > 0 else None
+)
+
+def resolve_interval(interval: Optional[str], bundle: Optional[ModelBundle] = None) -> str:
+    """Requested or default interval method, checking its artifact is there."""
+    interval = interval or INTERVAL_MODE
+    if interval == "conformal" and (bundle or current_bundle()).conformal is None:
+        raise HTTPException(status_code=503, detail="Conformal calibration not available")
+    return interval
+
+def model_headers(bundle: ModelBundle, tier: str) -> dict:
+    return {"X-Model-Version": bundle.version, "X-Model-Tier": tier}
+
+@app.exception_handler(Rejected)
+async def rejected_handler(request: Request, exc: Rejected):
+    if isinstance(exc, Overloaded):
+        return JSONResponse(status_code=503, content={"detail": str(exc)},
+                            headers={"Retry-After": str(exc.retry_after)})
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 # Prediction Endpoint
 @app.post("/predict")
-def predict_price(request: PricingRequest):
+async def predict_price(
+    request: PricingRequest, interval: Optional[IntervalMode] = None, tier: Optional[Tier] = None,
+    x_request_timeout_ms: Optional[float] = Header(default=None)
+):
+    deadline = request_deadline(x_request_timeout_ms)
+    bundle = await request_bundle()
+    interval = resolve_interval(interval, bundle)
+    tier = resolve_tier(tier, bundle)
+    headers = model_headers(bundle, tier)
     try:
-        X = prepare_features(request)
-
-        # Get predictions from all trees
-        tree_preds = np.stack([tree.predict(X.values)[0] for tree in model.estimators_])
-       
-        point_pred = tree_preds.mean()
-        lower = np.percentile(tree_preds, 5)
-        upper = np.percentile(tree_preds, 95)
-
-        return {
-            "predicted_price": round(float(point_pred), 2),
-            "confidence_interval_90": {
-                "lower_bound": round(float(lower), 2),
-                "upper_bound": round(float(upper), 2)
-            }
-        }
+        # Coalesce with other in-flight calls when micro-batching is enabled
+        if batcher is not None:
+            if admission is not None:
+                admission.check()
+            submitted = batcher.submit((request, interval, tier, bundle))
+            if deadline is None:
+                return json_response(await submitted, headers)
+            try:
+                # A caller past its deadline is dropped from its batch before scoring
+                return json_response(await asyncio.wait_for(submitted, deadline - time.monotonic()), headers)
+            except asyncio.TimeoutError:
+                if admission is not None:
+                    admission.expire()
+                raise DeadlineExceeded()
 
+        result = await run_scoring(score_requests, [request], interval, tier, bundle, deadline=deadline)
+        return json_response(result[0], headers)
+
+    except Rejected:
+        raise
     except Exception as e:
+        FAILURES.inc(endpoint="/predict", exception=type(e).__name__)
         raise HTTPException(status_code=500, detail=str(e))
 
-# Run Locally 
-if __name__ == "__main__":
-    print(f"Server is on port {os.getenv('port', 3000)}")
-    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv('port', 3000)))
+explanation_cache = (
+    PredictionCache(
+        EXPLAIN_CACHE_SIZE,
+        PREDICT_CACHE_TTL,
+        # The explainer isn't part of the bundle version, so a new one drops every entry
+        watch_paths=[SHAP_EXPLAINER_PATH]
+    )
+    if EXPLAIN_CACHE_SIZE > 0 else None
+)
+
+def explain_requests(requests: List[PricingRequest], explainer, bundle: Optional[ModelBundle] = None) -> List[dict]:
+    """Per-feature SHAP contributions for each request, computed in one batch."""
+    bundle = bundle or current_bundle()
+    with STAGE_SECONDS.time(stage="encode"):
+        X = prepare_features_batch(requests, bundle)
+    keys = row_keys(X, bundle.version)
+    results = explanation_cache.get_many(keys) if explanation_cache is not None else [None] * len(keys)
+
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        with STAGE_SECONDS.time(stage="shap"):
+            computed = scoring.explain_rows(explainer, X[missing])
+        if explanation_cache is not None:
+            explanation_cache.put_many([keys[i] for i in missing], computed)
+        for i, r in zip(missing, computed):
+            results[i] = r
+
+    return results
+
+# Batch Prediction Endpoint
+@app.post("/predict/batch")
+async def predict_price_batch(
+    requests: List[PricingRequest], interval: Optional[IntervalMode] = None, tier: Optional[Tier] = None,
+    x_request_timeout_ms: Optional[float] = Header(default=None)
+):
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(requests)} exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}"
+        )
+    deadline = request_deadline(x_request_timeout_ms)
+    bundle = await request_bundle()
+    interval = resolve_interval(interval, bundle)
+    tier = resolve_tier(tier, bundle)
+    headers = model_headers(bundle, tier)
+    if not requests:
+        return json_response({"predictions": []}, headers)
+
+    try:
+        # One feature matrix and one pass over the forest for the whole batch
+        results = await run_scoring(score_requests, requests, interval, tier, bundle, deadline=deadline)
+        return json_response({"predictions": results}, headers)
+
+    except Rejected:
+        raise
+    except Exception as e:
+        FAILURES.inc(endpoint="/predict/batch", exception=type(e).__name__)
+        raise HTTPException(status_code=500, detail=str(e))
+
+def describe_validation_error(e: ValidationError) -> str:
+    """First problem of a rejected row, e.g. 'bedrooms: Input should be a valid integer'."""
+    first = e.errors()[0]
+    return f"{'.'.join(str(p) for p in first['loc'])}: {first['msg']}"
+
+def score_stream_chunk(
+    chunk: List[tuple], interval: Optional[str] = None, tier: Optional[str] = None,
+    bundle: Optional[ModelBundle] = None
+) -> bytes:
+    """Validate, score and serialize one chunk of uploaded rows as NDJSON lines."""
+    results = {}
+    valid = []
+    for row, record, error in chunk:
+        if error is None:
+            try:
+                valid.append((row, PricingRequest.model_validate(record)))
+                continue
+            except ValidationError as e:
+                error = describe_validation_error(e)
+        results[row] = {"row": row, "error": error}
+
+    if valid:
+        for (row, _), result in zip(valid, score_requests([r for _, r in valid], interval, tier, bundle)):
+            results[row] = {"row": row, **result}
+
+    # Pass an uploaded id through so results can be joined back
+    for row, record, _ in chunk:
+        if record is not None and record.get("id") not in (None, ""):
+            results[row]["id"] = record["id"]
+
+    with STAGE_SECONDS.time(stage="serialize"):
+        return "".join(dumps(results[row]) + "\n" for row, _, _ in chunk).encode("utf-8")
+
+# Streaming Bulk Endpoint
+@app.post("/predict/stream")
+async def predict_price_stream(
+    request: Request, format: Optional[str] = None,
+    interval: Optional[IntervalMode] = None, tier: Optional[Tier] = None
+):
+    """
+    Score a CSV or NDJSON upload of listings (request field names or the
+    uppercase extract columns) and stream one NDJSON result line per row,
+    chunk by chunk while the upload is still arriving.
+    """
+    fmt = stream_format(format, request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or set ?format=csv|ndjson"
+        )
+    if admission is not None:
+        admission.check()
 
+    # The whole upload is scored by the bundle that was live when it started
+    bundle = await request_bundle()
+    interval = resolve_interval(interval, bundle)
+    tier = resolve_tier(tier, bundle)
+
+    async def results():
+        chunk = []
+        try:
+            async for item in iter_records(request.stream(), fmt):
+                chunk.append(item)
+                if len(chunk) >= STREAM_CHUNK_ROWS:
+                    # Chunks of an accepted upload wait their turn rather than being shed
+                    yield await run_scoring(score_stream_chunk, chunk, interval, tier, bundle, shed=False)
+                    chunk = []
+            if chunk:
+                yield await run_scoring(score_stream_chunk, chunk, interval, tier, bundle, shed=False)
+        except ClientDisconnect:
+            return
+        except StreamError as e:
+            # Headers are already sent: report on the stream and stop
+            yield (dumps({"error": str(e), "fatal": True}) + "\n").encode("utf-8")
+        except Exception as e:
+            FAILURES.inc(endpoint="/predict/stream", exception=type(e).__name__)
+            yield (dumps({"error": str(e), "fatal": True}) + "\n").encode("utf-8")
+
+    return DuplexStreamingResponse(results(), media_type="application/x-ndjson", headers=model_headers(bundle, tier))
+
+# Comparable Listings Endpoint
+@app.post("/comps")
+async def comparable_listings(
+    requests: Union[CompsRequest, List[CompsRequest]],
+    k: int = Query(default=5, ge=1, le=MAX_COMPS),
+    max_distance_km: Optional[float] = Query(default=None, gt=0)
+):
+    """
+    Nearest listings from the training data with the same property type and
+    bedroom band (0, 1, 2, 3, 4+), nearest first, with price and distance.
+    """
+    if isinstance(requests, CompsRequest):
+        requests = [requests]
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(requests)} exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}"
+        )
+
+    index = get_comps_index() if get_comps_index.is_loaded() else await run_in_threadpool(get_comps_index)
+    if index is None:
+        raise HTTPException(status_code=503, detail="Comparable listings not available")
+
+    def lookup():
+        with STAGE_SECONDS.time(stage="comps"):
+            return index.query(
+                [r.latitude for r in requests], [r.longitude for r in requests],
+                [r.propertytype for r in requests], [r.bedrooms for r in requests],
+                k=k, max_distance_km=max_distance_km
+            )
+
+    try:
+        # A lookup takes microseconds; only large batches are worth a thread hop
+        comps = lookup() if len(requests) <= COMPS_INLINE_BATCH else await run_in_threadpool(lookup)
+        return json_response({"comparables": comps})
 
+    except Exception as e:
+        FAILURES.inc(endpoint="/comps", exception=type(e).__name__)
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Market Reference Endpoint
+@app.post("/reference")
+def reference_price(
+    requests: Union[ReferenceRequest, List[ReferenceRequest]], start_level: Optional[ReferenceLevel] = None
+):
+    """
+    Count, median and mean listing price at the most specific populated
+    level of ZIP x type x bedrooms -> ZIP x type -> ZIP -> city -> state,
+    searched from `start_level` (the most specific level by default).
+    """
+    if isinstance(requests, ReferenceRequest):
+        requests = [requests]
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(requests)} exceeds MAX_BATCH_SIZE={MAX_BATCH_SIZE}"
+        )
+
+    cube = get_reference_cube()
+    if cube is None:
+        raise HTTPException(status_code=503, detail="Reference cube not available")
+
+    return json_response({
+        "references": [
+            cube.lookup(r.zipcode, r.propertytype, r.bedrooms, r.city, r.state, start_level)
+            for r in requests
+        ]
+    })
+
+# Explainability Endpoint
+@app.post("/explain")
+async def explain_price(
+    requests: Union[PricingRequest, List[PricingRequest]],
+    x_request_timeout_ms: Optional[float] = Header(default=None)
+):
+    if isinstance(requests, PricingRequest):
+        requests = [requests]
+    if len(requests) > MAX_EXPLAIN_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(requests)} exceeds MAX_EXPLAIN_BATCH_SIZE={MAX_EXPLAIN_BATCH_SIZE}"
+        )
+
+    deadline = request_deadline(x_request_timeout_ms)
+    bundle = await request_bundle()
+    explainer = await run_in_threadpool(bundle.explainer)
+    if explainer is None:
+        raise HTTPException(status_code=503, detail="SHAP explainer not available")
+
+    try:
+        explanations = (
+            await run_scoring(explain_requests, requests, explainer, bundle, deadline=deadline) if requests else []
+        )
+        return json_response({
+            "features": bundle.encoder.columns,
+            "explanations": explanations
+        }, {"X-Model-Version": bundle.version})
+
+    except Rejected:
+        raise
+    except Exception as e:
+        FAILURES.inc(endpoint="/explain", exception=type(e).__name__)
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Model Reload
+@app.post("/admin/reload")
+def reload_model(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Load the artifacts on disk as a new bundle and swap it in once it
+    validates; in-flight requests finish on the bundle they started with.
+    """
+    if not ADMIN_TOKEN or not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+    if prefork.parent_pid is not None:
+        # Each worker holds its own bundle: have the parent signal all of them
+        os.kill(prefork.parent_pid, signal.SIGHUP)
+        return Response(status_code=202, content=dumps({"status": "reload requested for every worker"}),
+                        media_type="application/json")
+
+    previous = model_bundle.current().version if model_bundle.is_loaded() else None
+    try:
+        bundle = model_bundle.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed, still serving {previous}: {e}")
+    return {"previous_version": previous, **bundle.info()}
+
+# Serving Stats
+@app.get("/stats")
+def serving_stats():
+    return {
+        "model": model_bundle.stats(),
+        "admission": admission.stats() if admission is not None else {"enabled": False},
+        "batching": batcher.stats() if batcher is not None else {"enabled": False},
+        "cache": prediction_cache.stats() if prediction_cache is not None else {"enabled": False},
+        "explain_cache": explanation_cache.stats() if explanation_cache is not None else {"enabled": False},
+        "artifacts_loaded": {
+            "model_bundle": model_bundle.is_loaded(),
+            "shap_explainer": model_bundle.is_loaded() and current_bundle().explainer_loaded,
+            "comps_index": get_comps_index.is_loaded(),
+            "reference_cube": get_reference_cube.is_loaded()
+        }
+    }
+
+# Scrape-time view of caches, micro-batching and loaded artifacts
+@metrics.collector
+def collect_serving_state():
+    cache_hits = Counter("pricing_api_cache_hits_total", "Result cache hits.", ("cache",))
+    cache_misses = Counter("pricing_api_cache_misses_total", "Result cache misses.", ("cache",))
+    cache_evictions = Counter("pricing_api_cache_evictions_total", "Entries evicted by the LRU bound.", ("cache",))
+    cache_entries = Gauge("pricing_api_cache_entries", "Entries currently cached.", ("cache",))
+    cache_hit_ratio = Gauge("pricing_api_cache_hit_ratio", "Hits over lookups since start.", ("cache",))
+    for name, cache in (("predict", prediction_cache), ("explain", explanation_cache)):
+        if cache is None:
+            continue
+        st = cache.stats()
+        cache_hits.inc(st["hits"], cache=name)
+        cache_misses.inc(st["misses"], cache=name)
+        cache_evictions.inc(st["evictions"], cache=name)
+        cache_entries.set(st["entries"], cache=name)
+        cache_hit_ratio.set(st["hit_rate"], cache=name)
+
+    microbatches = Counter("pricing_api_microbatches_total", "Forest passes made by the /predict coalescer.")
+    microbatched = Counter("pricing_api_microbatched_requests_total", "Requests scored through the coalescer.")
+    if batcher is not None:
+        st = batcher.stats()
+        microbatches.inc(st["batches"])
+        microbatched.inc(st["requests"])
+
+    bundle_loaded = model_bundle.is_loaded()
+    loaded = Gauge("pricing_api_artifact_loaded", "1 once an artifact has been loaded.", ("artifact",))
+    loaded.set(1 if bundle_loaded else 0, artifact="model_bundle")
+    loaded.set(1 if bundle_loaded and current_bundle().explainer_loaded else 0, artifact="shap_explainer")
+    for name, getter in (("comps_index", get_comps_index), ("reference_cube", get_reference_cube)):
+        loaded.set(1 if getter.is_loaded() else 0, artifact=name)
+
+    model_info = Gauge("pricing_api_model_info", "Version of the live model bundle (always 1).", ("version",))
+    model_loaded_at = Gauge("pricing_api_model_loaded_timestamp_seconds", "When the live bundle was loaded.")
+    if bundle_loaded:
+        bundle = current_bundle()
+        model_info.set(1, version=bundle.version)
+        model_loaded_at.set(bundle.loaded_at)
+    reloads = Counter("pricing_api_model_reloads_total", "Bundle reload attempts.", ("result",))
+    reloads.inc(model_bundle.reloads, result="success")
+    reloads.inc(model_bundle.failures, result="failure")
+
+    scoring_active = Gauge("pricing_api_scoring_active", "Scoring jobs holding an admission slot.")
+    scoring_queued = Gauge("pricing_api_scoring_queued", "Scoring jobs waiting for an admission slot.")
+    shed = Counter("pricing_api_requests_shed_total", "Scoring jobs rejected by admission control.", ("reason",))
+    if admission is not None:
+        st = admission.stats()
+        scoring_active.set(st["active"])
+        scoring_queued.set(st["queued"])
+        for reason, count in st["rejected"].items():
+            shed.inc(count, reason=reason)
+
+    return [cache_hits, cache_misses, cache_evictions, cache_entries, cache_hit_ratio,
+            microbatches, microbatched, loaded, model_info, model_loaded_at, reloads,
+            scoring_active, scoring_queued, shed]
+
+# Prometheus Metrics
+@app.get("/metrics")
+def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=Registry.CONTENT_TYPE)
+
+# Run Locally 
+if __name__ == "__main__":
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv('port', 3000))
+    workers = int(os.getenv("WORKERS", 1))
 
+    print(f"Server is on port {port}")
+    if workers > 1:
+        # Load the model once here; forked workers share its pages copy-on-write
+        prefork.serve_prefork(app, host=host, port=port, workers=workers, warm_up=warm_up)
+    else:
+        uvicorn.run(app, host=host, port=port)
@@ -0,0 +1,147 @@
+# lib/admission.py
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class Rejected(Exception):
+    """Work turned away by admission control instead of being queued indefinitely."""
+
+
+class Overloaded(Rejected):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Rejected):
+    def __init__(self):
+        super().__init__("Request deadline passed before it could be scored")
+
+
+class AdmissionController:
+    """
+    Bounds CPU-bound scoring work: at most `max_concurrency` jobs run at
+    once, at most `max_queue` wait for a slot (FIFO), and none waits longer
+    than `max_wait_s` or past its own deadline. Anything beyond that is
+    rejected immediately with an estimate of when to retry, so latency for
+    admitted requests stays bounded under overload instead of growing
+    with the backlog.
+
+    Used from the event loop only: `async with controller.slot(deadline):`.
+    """
+
+    # Weight of the newest job in the service-time average behind Retry-After
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait_s: float):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.max_concurrency = int(max_concurrency)
+        self.max_queue = int(max_queue)
+        self.max_wait = float(max_wait_s)
+
+        self.active = 0
+        self._waiters = deque()
+        self._service_time = None
+
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0, "deadline": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        per_job = self._service_time or 0.0
+        return max(1, math.ceil((self.queued + 1) * per_job / self.max_concurrency))
+
+    def check(self):
+        """Raise Overloaded now if a new job would be turned away at the queue."""
+        # A job waits whenever others already are, even if a slot is momentarily free
+        must_wait = self.active >= self.max_concurrency or self.queued > 0
+        if must_wait and self.queued >= self.max_queue:
+            self.rejected["queue_full"] += 1
+            raise Overloaded("queue full", self.retry_after())
+
+    def expire(self):
+        """Count and raise DeadlineExceeded for a job whose deadline passed while it waited elsewhere."""
+        self.rejected["deadline"] += 1
+        raise DeadlineExceeded()
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None, shed: bool = True):
+        """
+        Hold one concurrency slot for the body. `deadline` is a
+        time.monotonic() value; `shed=False` waits for as long as it takes
+        (for work whose callers were already admitted).
+        """
+        await self._acquire(deadline, shed)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._service_time = elapsed if self._service_time is None else (
+                self.EWMA_ALPHA * elapsed + (1 - self.EWMA_ALPHA) * self._service_time
+            )
+            self._release()
+
+    async def _acquire(self, deadline: Optional[float], shed: bool):
+        if deadline is not None and time.monotonic() >= deadline:
+            self.expire()
+
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        if shed:
+            self.check()
+
+        timeout = self.max_wait if shed else None
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # A released slot is handed straight to the oldest waiter
+            await asyncio.wait_for(waiter, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                self._release()  # the slot arrived just as we gave up
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            if deadline is not None and time.monotonic() >= deadline:
+                self.expire()
+            self.rejected["queue_timeout"] += 1
+            raise Overloaded("queue wait exceeded", self.retry_after())
+        self.admitted += 1
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "mean_service_ms": round(self._service_time * 1000.0, 3) if self._service_time else None,
+        }
@@ -0,0 +1,209 @@
+# lib/api_client.py
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ApiError(Exception):
+    """The pricing API answered, but not with a 2xx."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"Pricing API returned {status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class ApiUnavailable(Exception):
+    """The pricing API could not be reached, or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open, calls
+    fail immediately for `reset_after_s` seconds, then one trial call is let
+    through and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_after_s: float = 30.0):
+        self.failure_threshold = int(failure_threshold)
+        self.reset_after = float(reset_after_s)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_after or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_after - (time.monotonic() - self._opened_at))
+
+
+class BudgetedRetry(Retry):
+    """
+    Retry policy that only retries a 503 when it carries Retry-After (the
+    API shedding load), and caps the time slept across all retries of one
+    call at `wait_budget` seconds; once that is spent the call stops
+    retrying and the last response is returned.
+    """
+
+    def __init__(self, *args, wait_budget: Optional[float] = None, waited: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_budget = wait_budget
+        self.waited = waited
+
+    def new(self, **kwargs):
+        # urllib3 copies the policy on every increment; carry the budget along
+        kwargs.setdefault("wait_budget", self.wait_budget)
+        kwargs.setdefault("waited", self.waited)
+        return super().new(**kwargs)
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        # A 503 without Retry-After is a permanent "not available" answer
+        if status_code == 503 and not has_retry_after:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def is_exhausted(self) -> bool:
+        if self.wait_budget is not None and self.waited >= self.wait_budget:
+            return True
+        return super().is_exhausted()
+
+    def sleep(self, response=None):
+        wait = None
+        if response is not None and self.respect_retry_after_header:
+            wait = self.get_retry_after(response)
+        if wait is None:
+            wait = self.get_backoff_time()
+        if self.wait_budget is not None:
+            wait = min(wait, self.wait_budget - self.waited)
+        if wait > 0:
+            time.sleep(wait)
+        self.waited += max(wait, 0.0)
+
+
+class PricingApiClient:
+    """
+    Pooled client for the pricing API. One instance is meant to be shared by
+    everything in a process, so connections (and TLS sessions) are reused.
+
+    Every call has connect and read timeouts, and sends the read timeout as
+    X-Request-Timeout-Ms so the API drops work the caller has given up on.
+    Connection failures, 502, and 503 with Retry-After (load shedding) are
+    retried with exponential backoff, honouring Retry-After; that is safe
+    because every endpoint called is a read-only scoring call. The sleeps
+    between retries add at most the read timeout to a call. A 503 without
+    Retry-After means a feature is not available (no SHAP explainer,
+    calibration, comps index or reference cube) and is neither retried nor
+    counted against the API's health. 504 is not retried: the API returns
+    it when our own deadline has passed, and asking again would only wait
+    again. Failures that survive the retries feed a circuit breaker, so a
+    down API costs callers nothing while the breaker is open.
+    """
+
+    RETRY_STATUSES = (502, 503)
+
+    def __init__(self, base_url: str, connect_timeout: float = 3.05, read_timeout: float = 10.0,
+                 retries: int = 2, backoff: float = 0.3, pool_size: int = 10,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.breaker = breaker or CircuitBreaker()
+
+        retry = BudgetedRetry(
+            wait_budget=read_timeout,
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["X-Request-Timeout-Ms"] = str(int(read_timeout * 1000))
+
+    def request(self, method: str, path: str, **kwargs):
+        """Parsed JSON body of a 2xx response; ApiError or ApiUnavailable otherwise."""
+        if not self.breaker.allow():
+            raise ApiUnavailable(
+                f"Pricing API marked unavailable after repeated failures; retrying in {self.breaker.retry_in():.0f}s"
+            )
+
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            raise ApiUnavailable(f"Pricing API unreachable: {e}") from e
+
+        if response.status_code >= 500 and not self.feature_unavailable(response):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+        if not response.ok:
+            try:
+                detail = response.json().get("detail", response.text)
+            except ValueError:
+                detail = response.text
+            raise ApiError(response.status_code, str(detail))
+        return response.json()
+
+    @staticmethod
+    def feature_unavailable(response) -> bool:
+        """A 503 the API sends for a missing optional artifact rather than for overload."""
+        return response.status_code == 503 and "Retry-After" not in response.headers
+
+    def post(self, path: str, payload, params: Optional[dict] = None):
+        return self.request("POST", path, json=payload, params=params)
+
+    def predict(self, payload: dict, **params) -> dict:
+        return self.post("/predict", payload, params=params or None)
+
+    def predict_batch(self, payloads: list, **params) -> list:
+        """Predictions for many listings from one /predict/batch call (one forest pass server-side)."""
+        return self.post("/predict/batch", payloads, params=params or None)["predictions"]
+
+    def explain(self, payload) -> dict:
+        return self.post("/explain", payload)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,346 @@
+# lib/artifacts.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+MANIFEST_NAME = "artifacts_manifest.json"
+
+# Every published manifest holds these; the rest are optional extras
+REQUIRED_FILES = (
+    "randomforest_tuned_model.pkl",
+    "features_schema.json",
+    "frequency_maps.json",
+    "reference_averages.json",
+)
+OPTIONAL_FILES = (
+    "reference_cube.json",
+    "randomforest_tuned_model.forest",
+    "forest_tiers.json",
+    "conformal_calibration.json",
+    "shap_explainer.pkl",
+)
+TIERS_FILE = "forest_tiers.json"
+
+# (path, sha256) pairs already hashed in this process; a file is checked once, on first use
+_VERIFIED = set()
+
+
+class ArtifactError(Exception):
+    """Artifacts missing from the hub, or not matching their manifest."""
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def verify_file(path: str, entry: dict) -> bool:
+    """Whether `path` holds the manifest entry's content; hashed once per process."""
+    if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+        return False
+    key = (path, entry["sha256"])
+    if key not in _VERIFIED:
+        if sha256_file(path) != entry["sha256"]:
+            return False
+        _VERIFIED.add(key)
+    return True
+
+
+def version_tag(version: str) -> str:
+    """Hub revision (git tag) a manifest version is published under."""
+    return f"artifacts-{version}"
+
+
+def manifest_version(files: Dict[str, dict]) -> str:
+    """Content hash of the whole set: the same files always give the same version."""
+    combined = json.dumps(sorted((name, entry["sha256"]) for name, entry in files.items()))
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()[:12]
+
+
+def artifact_names(model_dir: str) -> List[str]:
+    """Artifact files present in `model_dir`, including the tier forests forest_tiers.json points at."""
+    names = [n for n in REQUIRED_FILES + OPTIONAL_FILES if os.path.exists(os.path.join(model_dir, n))]
+    tiers_path = os.path.join(model_dir, TIERS_FILE)
+    if os.path.exists(tiers_path):
+        with open(tiers_path, "r") as f:
+            for tier in json.load(f)["tiers"].values():
+                if tier["path"] not in names and os.path.exists(os.path.join(model_dir, tier["path"])):
+                    names.append(tier["path"])
+    return names
+
+
+def build_manifest(model_dir: str, names: Optional[Iterable[str]] = None) -> dict:
+    """Hash, size and mtime of each artifact, plus the version they make up together."""
+    files = {}
+    for name in (artifact_names(model_dir) if names is None else names):
+        path = os.path.join(model_dir, name)
+        files[name] = {"sha256": sha256_file(path), "size": os.path.getsize(path), "mtime": os.path.getmtime(path)}
+    missing = [n for n in REQUIRED_FILES if n not in files]
+    if missing:
+        raise ArtifactError(f"Required artifacts missing from {model_dir}: {', '.join(missing)}")
+    return {
+        "version": manifest_version(files),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+
+
+def changed_files(local: dict, remote: Optional[dict]) -> List[str]:
+    """Local artifacts whose content the hub doesn't already hold under that name."""
+    remote_files = (remote or {}).get("files", {})
+    return [
+        name for name, entry in local["files"].items()
+        if remote_files.get(name, {}).get("sha256") != entry["sha256"]
+    ]
+
+
+# Hubs: where artifacts are published. Both expose the same four calls.
+
+class LocalHub:
+    """
+    A directory laid out like the Hugging Face repo; a stand-in for tests
+    and offline setups. It holds only the latest published version.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def at_version(self, version: str) -> "LocalHub":
+        # No history to go back to; fetch() rejects a manifest of another version
+        return self
+
+    def read_manifest(self) -> Optional[dict]:
+        path = os.path.join(self.root, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def download(self, name: str, dest: str):
+        src = os.path.join(self.root, name)
+        if not os.path.exists(src):
+            raise ArtifactError(f"{name} not found in {self.root}")
+        shutil.copyfile(src, dest)
+
+    def upload(self, files: Dict[str, str], message: str, version: str):
+        os.makedirs(self.root, exist_ok=True)
+        # Manifest last, so a reader never sees it ahead of its files
+        for name in sorted(files, key=lambda n: n == MANIFEST_NAME):
+            tmp = os.path.join(self.root, f".{name}.tmp")
+            shutil.copyfile(files[name], tmp)
+            os.replace(tmp, os.path.join(self.root, name))
+
+
+class HfHub:
+    """A Hugging Face Hub model repo."""
+
+    def __init__(self, repo_id: str, token: Optional[str] = None, revision: Optional[str] = None):
+        self.repo_id = repo_id
+        self.token = token
+        self.revision = revision
+
+    def at_version(self, version: str) -> "HfHub":
+        """The same repo at the tag publish() created for `version`."""
+        return HfHub(self.repo_id, token=self.token, revision=version_tag(version))
+
+    def read_manifest(self) -> Optional[dict]:
+        try:
+            from huggingface_hub.errors import EntryNotFoundError, RevisionNotFoundError
+        except ImportError:  # huggingface_hub < 0.23
+            from huggingface_hub.utils import EntryNotFoundError, RevisionNotFoundError
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                dest = os.path.join(tmp, MANIFEST_NAME)
+                self.download(MANIFEST_NAME, dest)
+                with open(dest, "r") as f:
+                    return json.load(f)
+        except (EntryNotFoundError, RevisionNotFoundError):
+            return None
+
+    def download(self, name: str, dest: str):
+        from huggingface_hub import hf_hub_download
+        # Straight into our cache's staging dir, without a second copy in the HF cache
+        path = hf_hub_download(
+            repo_id=self.repo_id, filename=name, token=self.token, revision=self.revision,
+            local_dir=os.path.dirname(dest)
+        )
+        os.replace(path, dest)
+
+    def upload(self, files: Dict[str, str], message: str, version: str):
+        from huggingface_hub import CommitOperationAdd, HfApi
+        api = HfApi(token=self.token)
+        # One commit: the hub never holds a manifest that disagrees with its files
+        commit = api.create_commit(
+            repo_id=self.repo_id, repo_type="model", commit_message=message,
+            operations=[CommitOperationAdd(path_in_repo=name, path_or_fileobj=path) for name, path in files.items()],
+        )
+        # Tagged, so the version stays fetchable after newer ones are published
+        api.create_tag(self.repo_id, tag=version_tag(version), revision=commit.oid, repo_type="model", exist_ok=True)
+
+
+def publish(hub, model_dir: str, dry_run: bool = False) -> dict:
+    """
+    Push the artifacts in `model_dir` whose content changed since the hub's
+    manifest, plus the new manifest, as one upload tagged with the version.
+    Unchanged files are never re-sent. Returns {"version",
+    "previous_version", "uploaded", "unchanged"}.
+    """
+    manifest = build_manifest(model_dir)
+    remote = hub.read_manifest()
+    changed = changed_files(manifest, remote)
+    summary = {
+        "version": manifest["version"],
+        "previous_version": (remote or {}).get("version"),
+        "uploaded": changed,
+        "unchanged": [n for n in manifest["files"] if n not in changed],
+    }
+    if dry_run or (not changed and remote is not None and remote.get("version") == manifest["version"]):
+        return summary
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, MANIFEST_NAME)
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+        files = {name: os.path.join(model_dir, name) for name in changed}
+        files[MANIFEST_NAME] = manifest_path
+        hub.upload(files, f"Model artifacts {manifest['version']}", manifest["version"])
+    return summary
+
+
+class ArtifactCache:
+    """
+    Content-addressed local copy of the hub's artifacts.
+
+    Files are stored once per content hash under blobs/, verified when
+    downloaded and again on first use in each process (a blob that no longer
+    matches is fetched again), and exposed per manifest version as
+    versions/<version>/<name> (hard links to the blobs), so the files of one
+    version always sit together under their own names. The last fetched
+    manifest is kept, and a restart with every needed blob already present
+    touches no network.
+    """
+
+    def __init__(self, root: str, max_workers: int = 4):
+        self.root = root
+        self.max_workers = max_workers
+        self.blob_dir = os.path.join(root, "blobs")
+        self.staging_dir = os.path.join(root, "staging")
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256)
+
+    def cached_manifest(self) -> Optional[dict]:
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def has(self, entry: dict) -> bool:
+        """Whether the blob for `entry` is cached intact; a corrupted one is dropped."""
+        path = self.blob_path(entry["sha256"])
+        if verify_file(path, entry):
+            return True
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+
+    def fetch(self, hub, names: Optional[Iterable[str]] = None, refresh: bool = False,
+              version: Optional[str] = None) -> str:
+        """
+        Directory holding one consistent version of the artifacts: just
+        `names` (optional ones if published) or everything in the manifest.
+        The cached manifest is reused without asking the hub
+        unless `refresh` is set or it isn't `version`. A pinned `version` is
+        read from the hub revision publish() tagged for it.
+        """
+        manifest = self.cached_manifest()
+        if manifest is None or refresh or (version and manifest["version"] != version):
+            if version:
+                hub = hub.at_version(version)
+            manifest = hub.read_manifest()
+            if manifest is None and version:
+                raise ArtifactError(f"Artifact version {version} is not published on the hub")
+            if manifest is None:
+                raise ArtifactError(f"No {MANIFEST_NAME} on the hub; publish the artifacts with huggingFace.py")
+            if version and manifest["version"] != version:
+                raise ArtifactError(f"Hub holds artifact version {manifest['version']}, not {version}")
+
+        wanted = self._select(manifest, names)
+        missing = {name: entry for name, entry in wanted.items() if not self.has(entry)}
+        if missing:
+            self._download(hub, missing)
+        if self.cached_manifest() != manifest:
+            self._write_json(self.manifest_path, manifest)
+        return self._materialize(manifest["version"], wanted)
+
+    def _select(self, manifest: dict, names: Optional[Iterable[str]]) -> Dict[str, dict]:
+        # build_manifest() already refused to publish a set without the required files
+        files = manifest["files"]
+        if names is None:
+            return dict(files)
+        names = set(names)
+        absent = [n for n in REQUIRED_FILES if n in names and n not in files]
+        if absent:
+            raise ArtifactError(f"Manifest {manifest['version']} lacks required artifacts: {', '.join(absent)}")
+        return {name: entry for name, entry in files.items() if name in names}
+
+    def _download(self, hub, missing: Dict[str, dict]):
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+        def fetch_one(name: str, entry: dict):
+            staging = tempfile.mkdtemp(dir=self.staging_dir)
+            try:
+                dest = os.path.join(staging, name)
+                hub.download(name, dest)
+                digest = sha256_file(dest)
+                if digest != entry["sha256"]:
+                    raise ArtifactError(f"{name}: checksum {digest[:12]} does not match manifest {entry['sha256'][:12]}")
+                os.utime(dest, (entry["mtime"], entry["mtime"]))
+                os.replace(dest, self.blob_path(entry["sha256"]))
+                _VERIFIED.add((self.blob_path(entry["sha256"]), entry["sha256"]))
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        # Duplicate content under two names is fetched once
+        by_hash = {entry["sha256"]: (name, entry) for name, entry in missing.items()}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(by_hash))) as pool:
+            futures = [pool.submit(fetch_one, name, entry) for name, entry in by_hash.values()]
+            errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise ArtifactError("; ".join(str(e) for e in errors))
+
+    def _materialize(self, version: str, files: Dict[str, dict]) -> str:
+        version_dir = os.path.join(self.root, "versions", version)
+        os.makedirs(version_dir, exist_ok=True)
+        for name, entry in files.items():
+            path = os.path.join(version_dir, name)
+            blob = self.blob_path(entry["sha256"])
+            # A hard link to the blob (verified by has()) is the blob; a copy is hashed itself
+            if os.path.exists(path) and (os.path.samefile(path, blob) or verify_file(path, entry)):
+                continue
+            tmp = f"{path}.tmp"
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            try:
+                os.link(blob, tmp)
+            except OSError:
+                shutil.copy2(blob, tmp)
+            os.replace(tmp, path)
+        return version_dir
+
+    def _write_json(self, path: str, payload: dict):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(payload, f, indent=1)
+        os.replace(tmp, path)
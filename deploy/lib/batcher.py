@@ -0,0 +1,107 @@
+# lib/batcher.py
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single requests into one batched call.
+
+    Callers `await submit(item)`. Items are held for up to `window_ms`
+    (or until `max_batch_size` are waiting), scored together by
+    `score_batch` on a worker thread, and each caller gets its own result.
+    `gate`, if given, returns an async context manager held around each
+    batch's scoring call (e.g. an admission-control slot).
+    """
+
+    # Upper bounds of the achieved batch size histogram
+    SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+    def __init__(self, score_batch: Callable[[List[Any]], List[Any]], window_ms: float, max_batch_size: int,
+                 gate: Optional[Callable[[], Any]] = None):
+        if window_ms <= 0:
+            raise ValueError("window_ms must be positive")
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.score_batch = score_batch
+        self.gate = gate
+        self.window = window_ms / 1000.0
+        self.max_batch_size = int(max_batch_size)
+
+        self._pending = []
+        self._timer = None
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._max_seen = 0
+        self._size_counts = [0] * (len(self.SIZE_BUCKETS) + 1)
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run(batch))
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.gate() if self.gate is not None else nullcontext():
+                # Callers that gave up (deadline, disconnect) while waiting aren't scored
+                batch = [(item, future) for item, future in batch if not future.done()]
+                if not batch:
+                    return
+                self._record(len(batch))
+                results = await loop.run_in_executor(None, self.score_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Callers that gave up in the meantime simply don't get a result
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int):
+        bucket = next(
+            (i for i, bound in enumerate(self.SIZE_BUCKETS) if size <= bound),
+            len(self.SIZE_BUCKETS)
+        )
+        with self._stats_lock:
+            self._batches += 1
+            self._items += size
+            self._max_seen = max(self._max_seen, size)
+            self._size_counts[bucket] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            labels = [f"<={b}" for b in self.SIZE_BUCKETS] + [f">{self.SIZE_BUCKETS[-1]}"]
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch_size": self.max_batch_size,
+                "batches": self._batches,
+                "requests": self._items,
+                "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+                "max_batch_size_seen": self._max_seen,
+                "batch_size_histogram": dict(zip(labels, self._size_counts)),
+            }
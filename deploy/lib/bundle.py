@@ -0,0 +1,304 @@
+# lib/bundle.py
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from lib.cache import artifact_fingerprint
+from lib.conformal import ConformalIntervals
+from lib.features import FeatureEncoder
+from lib.forest import CompiledForest
+
+# Scored by every forest of a new bundle before it is allowed to go live
+PROBE_RECORD = {
+    "square_footage": 1000.0,
+    "bedrooms": 2,
+    "bathrooms": 1.0,
+    "latitude": 30.27,
+    "longitude": -97.74,
+    "city": "Austin",
+    "state": "TX",
+    "zipcode": "78701",
+    "propertytype": "Apartment",
+    "listed_date": "2025-01-01",
+}
+
+# (path, size, mtime) -> sha256, so unchanged files are not re-hashed on reload
+_digests = {}
+
+
+def file_digest(path: str) -> str:
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+class ModelBundle:
+    """
+    One consistent set of serving artifacts: full forest, tier forests,
+    feature encoder and conformal calibration, plus a lazily loaded SHAP
+    explainer. Never modified after loading; a request that picked up a
+    bundle keeps using it even if a newer one is swapped in meanwhile.
+
+    `version` is a content hash of the artifacts that determine
+    predictions, so every worker and host serving the same files reports
+    the same version.
+    """
+
+    def __init__(self, forest: CompiledForest, encoder: FeatureEncoder, tier_forests: Dict[str, CompiledForest],
+                 conformal: Optional[ConformalIntervals], digests: Dict[str, str], fingerprint: tuple,
+                 load_explainer: Callable[[], object], warnings: List[str]):
+        self.forest = forest
+        self.encoder = encoder
+        self.tier_forests = tier_forests
+        self.conformal = conformal
+        self.digests = digests
+        self.fingerprint = fingerprint  # what the watcher compares against
+        self.warnings = warnings
+        self.loaded_at = time.time()
+
+        combined = hashlib.sha256(json.dumps(sorted(digests.items())).encode("utf-8"))
+        self.version = combined.hexdigest()[:12]
+
+        self._load_explainer = load_explainer
+        self._explainer_lock = threading.Lock()
+        self._explainer = None
+        self.explainer_loaded = False
+
+    def tier_forest(self, tier: str) -> CompiledForest:
+        return self.tier_forests.get(tier) or self.forest
+
+    def explainer(self):
+        if not self.explainer_loaded:
+            with self._explainer_lock:
+                if not self.explainer_loaded:
+                    self._explainer = self._load_explainer()
+                    self.explainer_loaded = True
+        return self._explainer
+
+    def validate(self):
+        """Raise ValueError unless every forest scores the probe listing with finite values."""
+        X = self.encoder.encode([PROBE_RECORD])
+        for name, forest in {"full": self.forest, **self.tier_forests}.items():
+            if forest.n_features != self.encoder.n_features:
+                raise ValueError(
+                    f"{name} forest expects {forest.n_features} features but the schema has {self.encoder.n_features}"
+                )
+            preds = forest.predict_trees(X)
+            if not np.isfinite(preds).all():
+                raise ValueError(f"{name} forest returned non-finite predictions for the probe listing")
+        if self.conformal is not None:
+            lower, upper = self.conformal.bounds(self.forest.predict(X), [PROBE_RECORD["propertytype"]])
+            if not (np.isfinite(lower).all() and np.isfinite(upper).all()):
+                raise ValueError("Conformal calibration returned non-finite bounds")
+
+    def info(self) -> dict:
+        return {
+            "version": self.version,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.loaded_at)),
+            "n_trees": self.forest.n_trees,
+            "tiers": ["full"] + sorted(self.tier_forests),
+            "conformal": self.conformal is not None,
+            "artifacts": {name: digest[:12] for name, digest in sorted(self.digests.items())},
+            "warnings": self.warnings,
+        }
+
+
+def load_shap_explainer(explainer_path: str, model_path: str):
+    """Saved SHAP explainer, else a TreeExplainer over the pickled model; None if neither loads."""
+    try:
+        if os.path.exists(explainer_path):
+            with open(explainer_path, "rb") as f:
+                return pickle.load(f)
+
+        # No saved explainer: fall back to a path-dependent TreeExplainer
+        if os.path.exists(model_path):
+            import shap
+            with open(model_path, "rb") as f:
+                return shap.TreeExplainer(pickle.load(f))
+    except Exception as e:
+        print(f"SHAP explainer could not be loaded: {e}")
+    return None
+
+
+def load_bundle(paths: Dict[str, str], load_explainer: Callable[[], object]) -> ModelBundle:
+    """
+    Read and validate a complete artifact set. `paths` names the files:
+    model (pickle), forest (compact export), schema, freq_maps, tiers,
+    conformal and explainer; tiers, conformal and explainer may be missing.
+    """
+    # Taken before reading, so a file replaced mid-load triggers another reload
+    fingerprint = artifact_fingerprint(paths[name] for name in sorted(paths))
+    warnings, digests = [], {}
+
+    # A pickle newer than its export means a retrained model that wasn't re-exported yet
+    forest_path, model_path = paths["forest"], paths["model"]
+    if os.path.exists(forest_path) and not (
+        os.path.exists(model_path) and os.path.getmtime(model_path) > os.path.getmtime(forest_path)
+    ):
+        forest = CompiledForest.load(forest_path, mmap=True)
+        digests["forest"] = file_digest(forest_path)
+    else:
+        if os.path.exists(forest_path):
+            warnings.append(f"{os.path.basename(model_path)} is newer than its export; "
+                            f"compiled from the pickle (re-run export_forest.py)")
+        with open(model_path, "rb") as f:
+            forest = CompiledForest.from_sklearn(pickle.load(f))
+        digests["forest"] = file_digest(model_path)
+
+    with open(paths["schema"], "r") as f:
+        feature_columns = json.load(f)
+    with open(paths["freq_maps"], "r") as f:
+        freq_maps = json.load(f)
+    encoder = FeatureEncoder(feature_columns, freq_maps)
+    digests["schema"] = file_digest(paths["schema"])
+    digests["freq_maps"] = file_digest(paths["freq_maps"])
+
+    tier_forests = {}
+    if os.path.exists(paths["tiers"]):
+        with open(paths["tiers"], "r") as f:
+            profile = json.load(f)
+        for name, tier in profile["tiers"].items():
+            path = os.path.join(os.path.dirname(paths["tiers"]), tier["path"])
+            if name == "full" or not os.path.exists(path):
+                continue
+            fingerprint += artifact_fingerprint([path])
+            candidate = CompiledForest.load(path, mmap=True)
+            # Tiers are tree prefixes of the full forest; root values tell a stale one apart
+            n = candidate.n_trees
+            if n > forest.n_trees or not np.array_equal(
+                candidate.value[candidate.roots], forest.value[forest.roots[:n]]
+            ):
+                warnings.append(f"{name} tier was built from a different forest; "
+                                f"serving it from the full forest (re-run build_tiers.py)")
+                continue
+            tier_forests[name] = candidate
+            digests[f"tier:{name}"] = file_digest(path)
+
+    conformal = None
+    if os.path.exists(paths["conformal"]):
+        conformal = ConformalIntervals.load(paths["conformal"])
+        digests["conformal"] = file_digest(paths["conformal"])
+
+    bundle = ModelBundle(forest, encoder, tier_forests, conformal, digests, fingerprint, load_explainer, warnings)
+    bundle.validate()
+    return bundle
+
+
+class BundleManager:
+    """
+    Holds the live ModelBundle and replaces it without downtime.
+
+    reload() loads and validates a complete new bundle off to the side and
+    only then swaps the reference; requests already holding the old bundle
+    finish on it, and a set that fails to load or validate is never served.
+    watch() polls the bundle's files and reloads once a change has settled
+    for one poll, so a copy in progress isn't picked up half-written.
+    """
+
+    def __init__(self, load: Callable[[], ModelBundle]):
+        self._load = load
+        self._bundle = None
+        self._lock = threading.Lock()         # guards the first load
+        self._reload_lock = threading.Lock()  # one reload at a time
+        self._watcher = None
+
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_reload_at = None
+
+    def current(self) -> ModelBundle:
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._load()
+                bundle = self._bundle
+        return bundle
+
+    def is_loaded(self) -> bool:
+        return self._bundle is not None
+
+    def reload(self) -> ModelBundle:
+        """Load, validate and swap in a new bundle; on failure keep serving the old one and raise."""
+        with self._reload_lock:
+            try:
+                bundle = self._load()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            # A plain reference swap: readers see either the old bundle or the new one
+            self._bundle = bundle
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_at = time.time()
+            return bundle
+
+    def changed_on_disk(self) -> bool:
+        bundle = self._bundle
+        if bundle is None:
+            return False
+        return artifact_fingerprint(entry[0] for entry in bundle.fingerprint) != bundle.fingerprint
+
+    def reload_in_background(self):
+        def run():
+            try:
+                bundle = self.reload()
+                print(f"Model bundle {bundle.version} loaded")
+            except Exception as e:
+                print(f"Model reload failed, still serving the previous bundle: {e}")
+
+        threading.Thread(target=run, name="bundle-reload", daemon=True).start()
+
+    def watch(self, interval: float):
+        """Start a daemon thread reloading whenever the artifacts change on disk."""
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="bundle-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self, interval: float):
+        pending = failed = None
+        while True:
+            time.sleep(interval)
+            bundle = self._bundle
+            if bundle is None:
+                continue
+            fingerprint = artifact_fingerprint(entry[0] for entry in bundle.fingerprint)
+            if fingerprint == bundle.fingerprint or fingerprint == failed:
+                pending = None
+                continue
+            if fingerprint != pending:
+                pending = fingerprint  # changed since last poll: wait for it to settle
+                continue
+            try:
+                bundle = self.reload()
+                failed = None
+                print(f"Model artifacts changed; now serving bundle {bundle.version}")
+            except Exception as e:
+                failed = fingerprint  # don't retry until the files change again
+                print(f"Model reload failed, still serving the previous bundle: {e}")
+            pending = None
+
+    def stats(self) -> dict:
+        bundle = self._bundle
+        return {
+            **(bundle.info() if bundle is not None else {"version": None}),
+            "reloads": self.reloads,
+            "reload_failures": self.failures,
+            "last_reload_error": self.last_error,
+            "watching": self._watcher is not None,
+        }
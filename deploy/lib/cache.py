@@ -0,0 +1,113 @@
+# lib/cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Optional
+
+import numpy as np
+
+
+def artifact_fingerprint(paths: Iterable[str]) -> tuple:
+    """Cheap identity of a set of files: (path, size, mtime) for each one."""
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+def row_keys(X: np.ndarray, *context: str) -> List[bytes]:
+    """
+    Cache key per feature row: the exact float64 bytes the model sees, plus
+    whatever else changes the result (interval method, tier, model version).
+    """
+    suffix = "/".join(("",) + context).encode()
+    return [row.tobytes() + suffix for row in np.ascontiguousarray(X, dtype=np.float64)]
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with a per-entry TTL.
+
+    When `watch_paths` is given, the cache is emptied as soon as any of
+    those files changes (checked at most every `check_interval` seconds),
+    so results from a replaced model are never served.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, watch_paths: Iterable[str] = (), check_interval: float = 1.0):
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+        self.watch_paths = tuple(watch_paths)
+        self.check_interval = check_interval
+
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._fingerprint = artifact_fingerprint(self.watch_paths)
+        self._last_check = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_artifacts(self, now: float):
+        # Caller holds the lock
+        if not self.watch_paths or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        fingerprint = artifact_fingerprint(self.watch_paths)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._data.clear()
+            self.invalidations += 1
+
+    def get_many(self, keys: List[Hashable]) -> List[Optional[object]]:
+        """Cached value for each key, or None on a miss."""
+        now = time.monotonic()
+        found = []
+        with self._lock:
+            self._check_artifacts(now)
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and entry[0] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    found.append(entry[1])
+                else:
+                    if entry is not None:
+                        del self._data[key]
+                    self.misses += 1
+                    found.append(None)
+        return found
+
+    def put_many(self, keys: List[Hashable], values: List[object]):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,117 @@
+# lib/comps.py
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from lib.features import bedroom_band
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Listing columns returned with each comparable, as response field -> CSV column
+LISTING_FIELDS = {
+    "address": "ADDRESSLINE1",
+    "city": "CITY",
+    "state": "STATE",
+    "zipcode": "ZIPCODE",
+    "propertytype": "PROPERTYTYPE",
+    "bedrooms": "BEDROOMS",
+    "bathrooms": "BATHROOMS",
+    "square_footage": "SQUAREFOOTAGE",
+    "price": "PRICE",
+    "listed_date": "LISTEDDATE",
+    "days_on_market": "DAYSONMARKET",
+    "latitude": "LATITUDE",
+    "longitude": "LONGITUDE",
+}
+
+
+def unit_vectors(latitude, longitude) -> np.ndarray:
+    """Points on the unit sphere: straight-line distance between them orders pairs like great-circle distance."""
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2.0, 0.0, 1.0))
+
+
+class CompsIndex:
+    """
+    Nearest comparable listings by location, within the same property type
+    and bedroom band.
+
+    One KD-tree per (property type, bedroom band) over the listings' unit
+    vectors, so a query is a single exact nearest-neighbour lookup in the
+    matching tree, with no filtering afterwards. Batch queries are grouped
+    by tree and looked up together.
+    """
+
+    def __init__(self, listings: pd.DataFrame):
+        listings = listings.dropna(subset=["LATITUDE", "LONGITUDE", "PROPERTYTYPE", "BEDROOMS", "PRICE"])
+        listings = listings.reset_index(drop=True)
+        self.n_listings = len(listings)
+
+        # Response dicts built once, so a query only picks rows
+        records = listings[list(LISTING_FIELDS.values())].copy()
+        records["ZIPCODE"] = records["ZIPCODE"].astype(str).str.zfill(5)
+        records = records.astype(object).where(records.notna(), None)
+        self._records = [
+            {field: _plain(row[col]) for field, col in LISTING_FIELDS.items()}
+            for row in records.to_dict("records")
+        ]
+
+        keys = zip(listings["PROPERTYTYPE"].astype(str).str.strip().str.lower(),
+                   listings["BEDROOMS"].astype(int).map(bedroom_band))
+        members = defaultdict(list)
+        for i, key in enumerate(keys):
+            members[key].append(i)
+
+        points = unit_vectors(listings["LATITUDE"], listings["LONGITUDE"])
+        self._groups = {
+            key: (cKDTree(points[idx]), np.asarray(idx, dtype=np.intp))
+            for key, idx in members.items()
+        }
+
+    @classmethod
+    def from_csv(cls, path: str) -> "CompsIndex":
+        return cls(pd.read_csv(path, dtype={"ZIPCODE": str}))
+
+    def group_sizes(self) -> Dict[str, int]:
+        return {f"{ptype}|{band}": len(idx) for (ptype, band), (_, idx) in sorted(self._groups.items())}
+
+    def query(self, latitude: Sequence[float], longitude: Sequence[float], propertytypes: Sequence[str],
+              bedrooms: Sequence[int], k: int = 5, max_distance_km: Optional[float] = None) -> List[List[dict]]:
+        """Up to k comparables per query point, nearest first, each with its distance_km."""
+        points = unit_vectors(latitude, longitude)
+        keys = [(str(p).strip().lower(), bedroom_band(b)) for p, b in zip(propertytypes, bedrooms)]
+        results = [[] for _ in keys]
+
+        by_group = defaultdict(list)
+        for i, key in enumerate(keys):
+            by_group[key].append(i)
+
+        for key, rows in by_group.items():
+            group = self._groups.get(key)
+            if group is None:
+                continue
+            tree, idx = group
+            n = min(k, len(idx))
+            chord, pos = tree.query(points[rows], k=n)
+            chord, pos = chord.reshape(len(rows), n), pos.reshape(len(rows), n)
+            distance = chord_to_km(chord)
+            for row, dists, found in zip(rows, distance, pos):
+                results[row] = [
+                    {**self._records[idx[j]], "distance_km": round(float(d), 3)}
+                    for d, j in zip(dists, found)
+                    if max_distance_km is None or d <= max_distance_km
+                ]
+        return results
+
+
+def _plain(value):
+    # NumPy scalars -> Python types, so results serialize as plain JSON
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,110 @@
+# lib/conformal.py
+import json
+import math
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_COVERAGE = 0.9
+
+
+def conformal_quantile(scores: np.ndarray, coverage: float) -> float:
+    """Split-conformal threshold: the ceil((n + 1) * coverage)-th smallest score."""
+    n = len(scores)
+    k = math.ceil((n + 1) * coverage)
+    if n == 0 or k > n:
+        return float("inf")
+    return float(np.partition(scores, k - 1)[k - 1])
+
+
+def build_calibration(
+    predictions: Sequence[float],
+    actuals: Sequence[float],
+    propertytypes: Sequence[str],
+    coverage: float = DEFAULT_COVERAGE,
+    n_bands: int = 3,
+    min_stratum_size: int = 50,
+) -> dict:
+    """
+    Calibration table for split-conformal intervals from held-out predictions.
+
+    The score is the absolute residual. Thresholds are computed for every
+    property type x predicted-price band, per property type and overall;
+    groups with fewer than `min_stratum_size` rows fall back to the next
+    coarser level. Bands are quantiles of the predicted price so they can
+    be looked up at inference time.
+    """
+    predictions = np.asarray(predictions, dtype=np.float64)
+    actuals = np.asarray(actuals, dtype=np.float64)
+    propertytypes = np.asarray([str(p) for p in propertytypes])
+    scores = np.abs(actuals - predictions)
+
+    band_edges = np.quantile(predictions, np.arange(1, n_bands) / n_bands).tolist() if n_bands > 1 else []
+    bands = np.searchsorted(band_edges, predictions, side="right")
+
+    overall = {"q": conformal_quantile(scores, coverage), "n": int(len(scores))}
+    by_type, strata = {}, {}
+    for ptype in sorted(set(propertytypes)):
+        in_type = propertytypes == ptype
+        n = int(in_type.sum())
+        type_entry = (
+            {"q": conformal_quantile(scores[in_type], coverage), "n": n}
+            if n >= min_stratum_size else {**overall, "fallback": "global"}
+        )
+        by_type[ptype] = type_entry
+
+        for band in range(len(band_edges) + 1):
+            in_stratum = in_type & (bands == band)
+            n = int(in_stratum.sum())
+            strata[f"{ptype}|{band}"] = (
+                {"q": conformal_quantile(scores[in_stratum], coverage), "n": n}
+                if n >= min_stratum_size else {**type_entry, "fallback": type_entry.get("fallback", "propertytype")}
+            )
+
+    return {
+        "method": "split_conformal",
+        "score": "absolute_residual",
+        "coverage": coverage,
+        "n_calibration": int(len(scores)),
+        "min_stratum_size": min_stratum_size,
+        "band_edges": band_edges,
+        "global": overall,
+        "propertytype": by_type,
+        "strata": strata,
+    }
+
+
+class ConformalIntervals:
+    """
+    Intervals of point +/- a calibrated half-width looked up by property type
+    and predicted-price band: a couple of dict lookups per row, no per-tree
+    predictions needed.
+    """
+
+    def __init__(self, calibration: dict):
+        self.coverage = calibration["coverage"]
+        self.band_edges = np.asarray(calibration["band_edges"], dtype=np.float64)
+        self.global_q = calibration["global"]["q"]
+        self._by_type = {p: e["q"] for p, e in calibration["propertytype"].items()}
+        self._strata = {}
+        for key, entry in calibration["strata"].items():
+            ptype, band = key.rsplit("|", 1)
+            self._strata[(ptype, int(band))] = entry["q"]
+
+    @classmethod
+    def load(cls, path: str) -> "ConformalIntervals":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def half_widths(self, points: np.ndarray, propertytypes: Iterable[Optional[str]]) -> np.ndarray:
+        bands = np.searchsorted(self.band_edges, points, side="right")
+        return np.array([
+            self._strata.get((p, b), self._by_type.get(p, self.global_q))
+            for p, b in zip(propertytypes, bands.tolist())
+        ], dtype=np.float64)
+
+    def bounds(self, points: np.ndarray, propertytypes: Iterable[Optional[str]]) -> tuple:
+        """(lower, upper) per row; prices can't go below zero."""
+        points = np.asarray(points, dtype=np.float64)
+        q = self.half_widths(points, propertytypes)
+        return np.maximum(points - q, 0.0), points + q
@@ -0,0 +1,112 @@
+# lib/features.py
+from collections.abc import Mapping
+from datetime import date
+from typing import Iterable, List
+
+import numpy as np
+
+# Request field -> training column for the numeric inputs
+NUMERIC_FIELDS = {
+    "square_footage": "SQUAREFOOTAGE",
+    "bedrooms": "BEDROOMS",
+    "bathrooms": "BATHROOMS",
+    "latitude": "LATITUDE",
+    "longitude": "LONGITUDE",
+}
+
+# Request field -> frequency-encoded training column
+FREQ_FIELDS = {
+    "zipcode": "ZIPCODE",
+    "city": "CITY",
+    "state": "STATE",
+}
+
+PROPERTYTYPE_PREFIX = "PROPERTYTYPE_"
+
+# Bedroom counts grouped for comparables and reference prices; the last band is 4+
+BEDROOM_BANDS = (0, 1, 2, 3, 4)
+
+# Snowflake extract column -> request field, for uploads of raw extracts
+EXTRACT_COLUMNS = {
+    **{col: field for field, col in NUMERIC_FIELDS.items()},
+    **{col: field for field, col in FREQ_FIELDS.items()},
+    "PROPERTYTYPE": "propertytype",
+    "LISTEDDATE": "listed_date",
+}
+
+
+def bedroom_band(bedrooms) -> int:
+    return min(max(int(bedrooms), BEDROOM_BANDS[0]), BEDROOM_BANDS[-1])
+
+
+def _as_date(value) -> date:
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class FeatureEncoder:
+    """
+    Turns pricing requests into the model's feature matrix without pandas.
+
+    Column positions and lookup tables are resolved once from the feature
+    schema and frequency maps; encoding is then plain dict lookups written
+    into a preallocated float64 array. Records can be pydantic requests or
+    dicts keyed by the request field names.
+    """
+
+    def __init__(self, feature_columns: List[str], freq_maps: dict):
+        self.columns = [str(c) for c in feature_columns]
+        index = {col: i for i, col in enumerate(self.columns)}
+
+        self._numeric = [(field, index[col]) for field, col in NUMERIC_FIELDS.items() if col in index]
+        self._freq = [
+            (field, index[col], freq_maps.get(col, {}))
+            for field, col in FREQ_FIELDS.items() if col in index
+        ]
+        self._year = index.get("LISTING_YEAR")
+        self._month = index.get("LISTING_MONTH")
+        self._day = index.get("LISTING_DAY")
+        self._propertytype = {
+            col[len(PROPERTYTYPE_PREFIX):]: i
+            for col, i in index.items() if col.startswith(PROPERTYTYPE_PREFIX)
+        }
+
+    @property
+    def n_features(self) -> int:
+        return len(self.columns)
+
+    def encode_into(self, record, out: np.ndarray):
+        """Write one record's features into `out` (a zeroed row)."""
+        fields = record if isinstance(record, Mapping) else vars(record)
+
+        for field, i in self._numeric:
+            out[i] = fields[field]
+
+        # Unseen categories encode as 0, as in training
+        for field, i, freq_map in self._freq:
+            out[i] = freq_map.get(fields[field], 0)
+
+        listed = _as_date(fields["listed_date"])
+        if self._year is not None:
+            out[self._year] = listed.year
+        if self._month is not None:
+            out[self._month] = listed.month
+        if self._day is not None:
+            out[self._day] = listed.day
+
+        i = self._propertytype.get(fields["propertytype"])
+        if i is not None:
+            out[i] = 1
+
+    def encode(self, records: Iterable) -> np.ndarray:
+        """Feature matrix of shape (n_records, n_features)."""
+        records = list(records)
+        X = np.zeros((len(records), self.n_features), dtype=np.float64)
+        for row, record in zip(X, records):
+            self.encode_into(record, row)
+        return X
+
+    def encode_one(self, record) -> np.ndarray:
+        """Feature matrix of shape (1, n_features)."""
+        return self.encode([record])
@@ -0,0 +1,258 @@
+# lib/forest.py
+import json
+import os
+import struct
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Array-backed copy of a fitted sklearn forest regressor.
+
+    All trees are flattened into contiguous node arrays once, so a whole
+    batch can be pushed through every tree with a handful of NumPy ops per
+    depth level instead of one sklearn call per tree.
+    """
+
+    # Rows evaluated per traversal, bounding the (row, tree) working set
+    ROW_BLOCK = 1024
+    # Depth levels between compactions of finished (row, tree) pairs
+    COMPACT_EVERY = 4
+
+    # Node arrays persisted by save() / mapped by load()
+    ARRAYS = ("feature", "threshold", "children", "value", "missing_left", "is_leaf", "roots")
+    MAGIC = b"ATFOREST"
+    FORMAT_VERSION = 1
+    ALIGN = 64
+
+    def __init__(self, feature, threshold, children, value, missing_left, is_leaf, roots, n_features):
+        self.feature = feature            # split feature per node (leaves: 0)
+        self.threshold = threshold        # split threshold per node
+        self.children = children          # interleaved (left, right) global child ids; leaves point to themselves
+        self.value = value                # prediction stored at each node
+        self.missing_left = missing_left  # where NaN goes at each split
+        self.is_leaf = is_leaf
+        self.roots = roots                # global index of each tree's root
+        self.n_features = int(n_features)
+
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        features, thresholds, children, values, missing, leaves = [], [], [], [], [], []
+        roots = []
+        offset = 0
+
+        for est in model.estimators_:
+            tree = est.tree_
+            n_nodes = tree.node_count
+            leaf = tree.children_left < 0
+            node_ids = np.arange(n_nodes) + offset
+
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            pairs = np.empty(2 * n_nodes, dtype=np.int64)
+            pairs[0::2] = np.where(leaf, node_ids, tree.children_left + offset)
+            pairs[1::2] = np.where(leaf, node_ids, tree.children_right + offset)
+            children.append(pairs)
+            values.append(tree.value[:, 0, 0])
+            leaves.append(leaf)
+
+            # Older sklearn trees have no missing-value routing
+            ml = getattr(tree, "missing_go_to_left", None)
+            missing.append(np.zeros(n_nodes, dtype=bool) if ml is None else ml.astype(bool))
+
+            offset += n_nodes
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            missing_left=np.concatenate(missing),
+            is_leaf=np.concatenate(leaves),
+            roots=np.asarray(roots, dtype=np.int32),
+            n_features=model.n_features_in_,
+        )
+
+    def save(self, path: str, float32: bool = False):
+        """
+        Write the node arrays to one flat file that load() can memory-map.
+
+        With float32=True values are stored in single precision and each
+        threshold is rounded down to the nearest float32, which keeps every
+        split decision identical for the float32 inputs trees are evaluated on.
+        """
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in self.ARRAYS}
+        if float32:
+            threshold = arrays["threshold"].astype(np.float32)
+            rounded_up = threshold.astype(np.float64) > arrays["threshold"]
+            threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+            arrays["threshold"] = threshold
+            arrays["value"] = arrays["value"].astype(np.float32)
+
+        layout, offset = {}, 0
+        for name, arr in arrays.items():
+            offset = -(-offset // self.ALIGN) * self.ALIGN
+            layout[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset += arr.nbytes
+
+        header = json.dumps({
+            "version": self.FORMAT_VERSION,
+            "n_features": self.n_features,
+            "arrays": layout,
+        }).encode("utf-8")
+        # Array offsets are relative to the first aligned byte after the header
+        data_start = -(-(len(self.MAGIC) + 8 + len(header)) // self.ALIGN) * self.ALIGN
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name, arr in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(arr.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "CompiledForest":
+        """
+        Open a file written by save(). With mmap=True the arrays are
+        read-only views of one shared file mapping, so every process serving
+        the same file shares a single physical copy through the page cache.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"{path} is not a compiled forest file")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+
+        if header.get("version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled forest version: {header.get('version')}")
+
+        data_start = -(-(len(cls.MAGIC) + 8 + header_len) // cls.ALIGN) * cls.ALIGN
+        if mmap:
+            buf = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            buf = np.fromfile(path, dtype=np.uint8)
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"]))
+            start = data_start + spec["offset"]
+            arrays[name] = buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+        return cls(n_features=header["n_features"], **arrays)
+
+    def node_depths(self) -> np.ndarray:
+        """Depth of every node below its tree's root (roots are 0)."""
+        depth = np.zeros(self.n_nodes, dtype=np.int32)
+        frontier = self.roots.astype(np.intp)
+        level = 0
+        while frontier.size:
+            depth[frontier] = level
+            frontier = frontier[~self.is_leaf[frontier]]
+            frontier = self.children[np.concatenate([2 * frontier, 2 * frontier + 1])].astype(np.intp)
+            level += 1
+        return depth
+
+    def subset(self, n_trees: int = None, max_depth: int = None) -> "CompiledForest":
+        """
+        Smaller forest from the first `n_trees` trees, each cut off at
+        `max_depth`. A cut node becomes a leaf predicting its stored value,
+        the mean target of its training samples, which is exactly what a
+        tree grown with that max_depth would predict there.
+        """
+        n_trees = self.n_trees if n_trees is None else min(int(n_trees), self.n_trees)
+        end = int(self.roots[n_trees]) if n_trees < self.n_trees else self.n_nodes
+
+        keep = np.zeros(self.n_nodes, dtype=bool)
+        keep[:end] = True
+        is_leaf = np.array(self.is_leaf, dtype=bool)
+        if max_depth is not None:
+            depth = self.node_depths()
+            keep &= depth <= max_depth
+            is_leaf |= depth == max_depth
+
+        new_id = np.cumsum(keep) - 1
+        old = np.flatnonzero(keep)
+        leaf = is_leaf[old]
+        children = self.children.reshape(-1, 2)[old].astype(np.int64)
+        children = np.where(leaf[:, None], new_id[old][:, None], new_id[children])
+
+        return CompiledForest(
+            feature=np.where(leaf, 0, self.feature[old]).astype(np.int32),
+            threshold=np.asarray(self.threshold[old], dtype=np.float64),
+            children=children.reshape(-1).astype(np.int32),
+            value=np.asarray(self.value[old], dtype=np.float64),
+            missing_left=np.asarray(self.missing_left[old], dtype=bool),
+            is_leaf=leaf,
+            roots=new_id[self.roots[:n_trees]].astype(np.int32),
+            n_features=self.n_features,
+        )
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.ARRAYS)
+
+    def predict_trees(self, X) -> np.ndarray:
+        """Per-tree predictions, shape (n_rows, n_trees)."""
+        # sklearn evaluates trees on float32 inputs; match it exactly
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input of shape (n, {self.n_features}), got {X.shape}")
+
+        out = np.empty((X.shape[0], self.n_trees), dtype=np.float64)
+        for start in range(0, X.shape[0], self.ROW_BLOCK):
+            stop = start + self.ROW_BLOCK
+            out[start:stop] = self._traverse(X[start:stop])
+        return out
+
+    def _traverse(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_trees = X.shape[0], self.n_trees
+        out = np.empty(n_rows * n_trees, dtype=np.float64)
+        X_flat = X.ravel()
+        has_nan = bool(np.isnan(X_flat).any())
+
+        # One (row, tree) pair per output slot, all starting at their tree's root
+        pos = np.arange(n_rows * n_trees, dtype=np.intp)
+        row_base = (pos // n_trees) * self.n_features
+        nodes = np.tile(self.roots.astype(np.intp), n_rows)
+
+        depth = 0
+        while pos.size:
+            x = X_flat[row_base + self.feature[nodes]]
+            if has_nan:
+                go_right = ~(x <= self.threshold[nodes])
+                nan = np.isnan(x)
+                go_right[nan] = ~self.missing_left[nodes[nan]]
+            else:
+                go_right = x > self.threshold[nodes]
+            # Leaves point back to themselves, so finished pairs just idle;
+            # node ids are widened once per level so later gathers index natively
+            nodes = self.children[2 * nodes + go_right].astype(np.intp, copy=False)
+
+            # Every few levels, write out and drop pairs that reached a leaf
+            depth += 1
+            if depth % self.COMPACT_EVERY == 0:
+                done = self.is_leaf[nodes]
+                if done.any():
+                    out[pos[done]] = self.value[nodes[done]]
+                    keep = ~done
+                    pos, row_base, nodes = pos[keep], row_base[keep], nodes[keep]
+
+        return out.reshape(n_rows, n_trees)
+
+    def predict(self, X) -> np.ndarray:
+        """Forest mean prediction per row."""
+        return self.predict_trees(X).mean(axis=1)
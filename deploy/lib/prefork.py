@@ -0,0 +1,107 @@
+# lib/prefork.py
+import os
+import signal
+import socket
+import time
+from typing import Callable, Optional
+
+import uvicorn
+
+# Set in forked workers: pid of the parent that spawned them
+parent_pid: Optional[int] = None
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # IPPROTO_TCP explicitly: asyncio only enables TCP_NODELAY on accepted
+    # connections whose socket proto says TCP
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, parent: int, **uvicorn_kwargs):
+    global parent_pid
+    parent_pid = parent
+    # Children handle their own shutdown through uvicorn's signal handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    # Forwarded reload requests are ignored unless the app installs a handler
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    config = uvicorn.Config(app, **uvicorn_kwargs)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_prefork(app, host: str, port: int, workers: int, warm_up: Optional[Callable[[], None]] = None, **uvicorn_kwargs):
+    """
+    Serve `app` from `workers` forked uvicorn processes sharing one socket.
+
+    `warm_up` runs once in the parent before forking, so artifacts it loads
+    (model, encoder) are shared copy-on-write by every worker rather than
+    loaded again per process. Workers that die are restarted; SIGTERM or
+    SIGINT on the parent shuts all of them down, and SIGHUP is forwarded to
+    every worker (the app decides what it means, e.g. reloading artifacts).
+    """
+    if os.name != "posix":
+        raise RuntimeError("Multi-process serving needs fork(); run with WORKERS=1 on this platform")
+
+    if warm_up is not None:
+        warm_up()
+
+    sock = _bind(host, port)
+    children = set()
+    stopping = False
+    parent = os.getpid()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, parent, **uvicorn_kwargs)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def forward(signum, frame):
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, forward)
+
+    for _ in range(workers):
+        spawn()
+    print(f"Serving on {host}:{port} with {workers} workers (parent pid {os.getpid()})")
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+
+            children.discard(pid)
+            if not stopping:
+                print(f"Worker {pid} exited with status {status}; restarting")
+                time.sleep(0.5)  # avoid a tight crash loop
+                spawn()
+    finally:
+        sock.close()
@@ -0,0 +1,100 @@
+# lib/reference.py
+import json
+from typing import Optional
+
+import pandas as pd
+
+from lib.features import bedroom_band
+
+# Most to least specific; a lookup returns the first level with a populated cell
+LEVELS = ("zip_type_beds", "zip_type", "zip", "city", "state")
+LEVEL_COLUMNS = {
+    "zip_type_beds": ("ZIPCODE", "PROPERTYTYPE", "BEDROOMS"),
+    "zip_type": ("ZIPCODE", "PROPERTYTYPE"),
+    "zip": ("ZIPCODE",),
+    "city": ("CITY", "STATE"),
+    "state": ("STATE",),
+}
+# Statistics stored per cell, in order
+FIELDS = ("count", "median", "mean")
+
+
+def _zip(value) -> str:
+    value = str(value).strip()
+    return value.zfill(5) if value.isdigit() else value
+
+
+def cell_keys(zipcode, propertytype, bedrooms, city, state) -> dict:
+    """Cell key at every level for one listing; the same normalization at build and lookup time."""
+    z, p, b = _zip(zipcode), str(propertytype).strip().lower(), str(bedroom_band(bedrooms))
+    c, s = str(city).strip().lower(), str(state).strip().upper()
+    return {
+        "zip_type_beds": f"{z}|{p}|{b}",
+        "zip_type": f"{z}|{p}",
+        "zip": z,
+        "city": f"{c}|{s}",
+        "state": s,
+    }
+
+
+def build_reference_cube(data: pd.DataFrame, min_count: int = 5) -> dict:
+    """
+    Count, median and mean PRICE for every cell of every level, keeping
+    cells backed by at least `min_count` listings so a benchmark is never
+    one or two outliers.
+    """
+    data = data.dropna(subset=["PRICE", "ZIPCODE", "PROPERTYTYPE", "BEDROOMS", "CITY", "STATE"])
+    keys = pd.DataFrame([
+        cell_keys(*row) for row in
+        zip(data["ZIPCODE"], data["PROPERTYTYPE"], data["BEDROOMS"], data["CITY"], data["STATE"])
+    ], index=data.index)
+    price = data["PRICE"].astype(float)
+
+    cells = {}
+    for level in LEVELS:
+        stats = price.groupby(keys[level]).agg(["count", "median", "mean"])
+        stats = stats[stats["count"] >= min_count]
+        cells[level] = {
+            key: [int(row["count"]), round(float(row["median"]), 2), round(float(row["mean"]), 2)]
+            for key, row in stats.iterrows()
+        }
+
+    return {
+        "min_count": int(min_count),
+        "levels": list(LEVELS),
+        "fields": list(FIELDS),
+        "global": [int(price.count()), round(float(price.median()), 2), round(float(price.mean()), 2)],
+        "cells": cells,
+    }
+
+
+class ReferenceCube:
+    """
+    Precomputed market reference prices, resolved to the most specific
+    populated level (ZIP x type x bedroom band -> ZIP x type -> ZIP ->
+    city -> state -> everything) with one dict lookup per level.
+    """
+
+    def __init__(self, cube: dict):
+        self.min_count = cube["min_count"]
+        self.cells = cube["cells"]
+        self.global_stats = cube["global"]
+
+    @classmethod
+    def load(cls, path: str) -> "ReferenceCube":
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def lookup(self, zipcode, propertytype, bedrooms, city, state, start_level: Optional[str] = None) -> dict:
+        """
+        Reference cell for a listing as {"level", "key", "count", "median",
+        "mean"}. The search starts at `start_level`, skipping the more
+        specific levels, and falls back to broader ones from there.
+        """
+        keys = cell_keys(zipcode, propertytype, bedrooms, city, state)
+        levels = LEVELS[LEVELS.index(start_level):] if start_level else LEVELS
+        for level in levels:
+            stats = self.cells[level].get(keys[level])
+            if stats is not None:
+                return {"level": level, "key": keys[level], **dict(zip(FIELDS, stats))}
+        return {"level": "global", "key": None, **dict(zip(FIELDS, self.global_stats))}
@@ -0,0 +1,98 @@
+# lib/scoring.py
+from collections.abc import Mapping
+from contextlib import nullcontext
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+
+from lib.bundle import ModelBundle
+
+# Interval methods: spread across trees, or the split-conformal table
+INTERVAL_MODES = ("trees", "conformal")
+
+
+def _no_stage(name: str):
+    return nullcontext()
+
+
+def tree_pred_bounds(tree_preds: np.ndarray) -> tuple:
+    """Mean and 5th/95th percentile across trees, one value per row."""
+    return (
+        tree_preds.mean(axis=1),
+        np.percentile(tree_preds, 5, axis=1),
+        np.percentile(tree_preds, 95, axis=1)
+    )
+
+
+def summarize_tree_preds(tree_preds: np.ndarray) -> List[dict]:
+    """Point prediction and 90% interval for each row of a per-tree matrix."""
+    return summarize_bounds(*tree_pred_bounds(tree_preds))
+
+
+def summarize_bounds(point_preds: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> List[dict]:
+    return [
+        {
+            "predicted_price": round(float(p), 2),
+            "confidence_interval_90": {
+                "lower_bound": round(float(lo), 2),
+                "upper_bound": round(float(hi), 2)
+            }
+        }
+        for p, lo, hi in zip(point_preds, lower, upper)
+    ]
+
+
+def resolve_tier(bundle: ModelBundle, tier: Optional[str], default: str = "full") -> str:
+    """Requested or default tier; tiers that weren't built are served by the full forest."""
+    tier = tier or default
+    return tier if tier in bundle.tier_forests else "full"
+
+
+def record_propertytypes(records: Iterable) -> List[Optional[str]]:
+    return [(r if isinstance(r, Mapping) else vars(r)).get("propertytype") for r in records]
+
+
+def predict_rows(
+    bundle: ModelBundle, X: np.ndarray, propertytypes: List[Optional[str]], interval: str = "trees",
+    tier: str = "full", stage: Callable = _no_stage
+) -> List[dict]:
+    """
+    Price and 90% interval for each encoded row. `stage(name)` returns a
+    context manager wrapped around the "forest" and "interval" steps, for
+    callers that time them.
+    """
+    if interval == "conformal":
+        if bundle.conformal is None:
+            raise ValueError("Conformal calibration not available")
+        # Only the forest mean is needed; the interval is a table lookup per row
+        with stage("forest"):
+            point_preds = bundle.tier_forest(tier).predict(X)
+        with stage("interval"):
+            lower, upper = bundle.conformal.bounds(point_preds, propertytypes)
+            return summarize_bounds(point_preds, lower, upper)
+
+    with stage("forest"):
+        tree_preds = bundle.tier_forest(tier).predict_trees(X)
+    with stage("interval"):
+        return summarize_tree_preds(tree_preds)
+
+
+def score_records(bundle: ModelBundle, records: list, interval: str = "trees", tier: Optional[str] = None) -> List[dict]:
+    """Encode and score records (pydantic requests or dicts) exactly as the API's /predict does."""
+    X = bundle.encoder.encode(records)
+    return predict_rows(bundle, X, record_propertytypes(records), interval, resolve_tier(bundle, tier))
+
+
+def explain_rows(explainer, X: np.ndarray) -> List[dict]:
+    """Per-feature SHAP contributions for each encoded row, in one explainer call."""
+    explanation = explainer(X, check_additivity=False)
+    values = np.asarray(explanation.values).reshape(len(X), -1)
+    base_values = np.broadcast_to(np.asarray(explanation.base_values, dtype=np.float64).reshape(-1), (len(X),))
+    return [
+        {
+            "model_output": round(float(base + contrib.sum()), 2),
+            "base_value": round(float(base), 2),
+            "contributions": [round(float(v), 2) for v in contrib]
+        }
+        for base, contrib in zip(base_values, values)
+    ]
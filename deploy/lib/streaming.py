@@ -0,0 +1,143 @@
+# lib/streaming.py
+import csv
+import json
+import math
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+from starlette.responses import StreamingResponse
+
+from lib.features import EXTRACT_COLUMNS
+
+# A single CSV record or NDJSON line longer than this is rejected
+MAX_LINE_BYTES = 1 << 20
+
+STREAM_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+}
+
+
+class StreamError(ValueError):
+    """The upload as a whole can't be parsed any further."""
+
+
+def stream_format(explicit: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """'csv' or 'ndjson' from a ?format= override or the Content-Type, else None."""
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in ("csv", "ndjson") else None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return STREAM_FORMATS.get(media_type)
+
+
+def normalize_record(raw: dict) -> dict:
+    """Map uppercase extract columns or request field names onto request fields."""
+    record = {}
+    for key, value in raw.items():
+        key = str(key).strip()
+        record[EXTRACT_COLUMNS.get(key.upper(), key.lower())] = value
+
+    # Extracts and spreadsheets often turn ZIP codes into numbers
+    zipcode = record.get("zipcode")
+    if isinstance(zipcode, (int, float)) and not isinstance(zipcode, bool) and math.isfinite(zipcode):
+        record["zipcode"] = str(int(zipcode)).zfill(5)
+    elif isinstance(zipcode, str):
+        zipcode = zipcode.strip()
+        if zipcode.endswith(".0"):
+            zipcode = zipcode[:-2]
+        record["zipcode"] = zipcode.zfill(5) if zipcode.isdigit() else zipcode
+    return record
+
+
+def extract_records(rows: Iterable[dict]) -> List[dict]:
+    """Request-field dicts from extract rows (e.g. DataFrame.to_dict("records")); other columns are dropped."""
+    fields = set(EXTRACT_COLUMNS.values())
+    return [{k: v for k, v in normalize_record(row).items() if k in fields} for row in rows]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES,
+                     keep_ends: bool = False) -> AsyncIterator[bytes]:
+    """Complete lines from a stream of byte chunks, without line endings unless `keep_ends`."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + b"\n" if keep_ends else line.rstrip(b"\r")
+        if len(buffer) > max_line_bytes:
+            raise StreamError(f"Line longer than {max_line_bytes} bytes")
+    if buffer.strip():
+        yield buffer if keep_ends else buffer.rstrip(b"\r")
+
+
+async def iter_records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    (row number, record, error) for every row of a CSV or NDJSON upload.
+
+    Rows are numbered from 1 (the CSV header doesn't count). A row that
+    can't be parsed comes back with record None and an error message, so
+    one bad line doesn't end the stream; StreamError does.
+    """
+    row = 0
+    if fmt == "ndjson":
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                raw = json.loads(line)
+            except ValueError as e:
+                yield row, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(raw, dict):
+                yield row, None, "Expected a JSON object"
+                continue
+            yield row, normalize_record(raw), None
+        return
+
+    header = None
+    pending = ""
+    # Line endings are kept so a quoted field spanning lines keeps its own (\n or \r\n)
+    async for line in iter_lines(chunks, keep_ends=True):
+        text = line.decode("utf-8-sig" if header is None and not pending else "utf-8", errors="replace")
+        pending += text
+        # An odd number of quotes means a quoted field continues on the next line
+        if pending.count('"') % 2:
+            if len(pending) > MAX_LINE_BYTES:
+                raise StreamError("Unterminated quoted CSV field")
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = values
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, normalize_record(dict(zip(header, values))), None
+
+    if pending:
+        raise StreamError("Unterminated quoted CSV field at end of upload")
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body generator is still reading the request.
+
+    Starlette normally listens for a client disconnect alongside the body,
+    which would swallow the request's remaining body messages; here a
+    disconnect surfaces from request.stream() instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
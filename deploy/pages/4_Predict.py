@@ -1,18 +1,14 @@
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-import requests
+from calendar import monthrange
 from datetime import datetime
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from streamlit_shap import st_shap 
-from huggingface_hub import hf_hub_download
+from lib.api_client import ApiError, ApiUnavailable, CircuitBreaker, PricingApiClient
 from lib.app_shell import init_state, hide_default_streamlit_pages_nav, render_sidebar, require_auth
-import pickle
+from lib.features import BEDROOM_BANDS, bedroom_band
+from lib.reference import ReferenceCube
 import json
-import shap
 import os
-import joblib  
 from dotenv import load_dotenv
 
 # --- Load .env variables ---
@@ -20,7 +16,47 @@ load_dotenv()
 
 # Detect Local Environment 
 IS_LOCAL = os.getenv("IS_LOCAL", "true").lower() == "true"
-ENABLE_SHAP = IS_LOCAL  # SHAP is only enabled locally
+ENABLE_SHAP = os.getenv("ENABLE_SHAP", "true").lower() == "true"  # SHAP is computed wherever predictions are
+PREDICT_TIER = os.getenv("PREDICT_TIER", "fast")  # forest tier for interactive predictions (see build_tiers.py)
+ENABLE_WHAT_IF = os.getenv("ENABLE_WHAT_IF", "true").lower() == "true"
+WHAT_IF_STEPS = int(os.getenv("WHAT_IF_STEPS", 50))  # square-footage points per bedroom curve
+
+# Pricing API (serves /predict and /explain)
+def api_setting(name: str, default: str) -> str:
+    value = os.getenv(name)
+    if value is None:
+        try:
+            value = st.secrets[name]
+        except Exception:
+            value = default
+    return str(value)
+
+
+API_BASE_URL = api_setting("PRICING_API_URL", "https://kl8fjd4z-8000.uks1.devtunnels.ms")
+# "api": score through the pricing API; "local": score in this process with the same lib/scoring.py pipeline
+PREDICT_MODE = api_setting("PREDICT_MODE", "api").lower()
+
+# Heavy modules are imported where they're used, so the first page load only pays for what it renders
+# (python benchmarks/page_startup_report.py); in-process scoring pulls in the forest engine
+if PREDICT_MODE == "local":
+    from lib import scoring
+    from lib.bundle import load_bundle, load_shap_explainer
+
+
+@st.cache_resource
+def get_api_client() -> PricingApiClient:
+    """One pooled client per Streamlit process, shared across sessions and reruns."""
+    return PricingApiClient(
+        API_BASE_URL,
+        connect_timeout=float(api_setting("PRICING_API_CONNECT_TIMEOUT", "3.05")),
+        read_timeout=float(api_setting("PRICING_API_READ_TIMEOUT", "10")),
+        retries=int(api_setting("PRICING_API_RETRIES", "2")),
+        backoff=float(api_setting("PRICING_API_BACKOFF", "0.3")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(api_setting("PRICING_API_BREAKER_THRESHOLD", "3")),
+            reset_after_s=float(api_setting("PRICING_API_BREAKER_RESET_S", "30")),
+        ),
+    )
 
 # Load Hugging Face Token 
 hf_token = os.getenv("HF_TOKEN")
@@ -45,8 +81,22 @@ artifact_files = {
     "ref_avg": "reference_averages.json"
 }
 
+# Optional extras for PREDICT_MODE=local: compact forest, tiers, calibration, explainer
+local_artifact_files = {
+    "forest": "randomforest_tuned_model.forest",
+    "tiers": "forest_tiers.json",
+    "conformal": "conformal_calibration.json",
+    "explainer": "shap_explainer.pkl",
+}
+
 artifact_paths = {}
 
+# Content-addressed cache of hub artifacts (lib/artifacts.py); a warm restart reuses it without network
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.expanduser("~/.cache/centralised-data-platform/artifacts"))
+ARTIFACT_HUB_DIR = os.getenv("ARTIFACT_HUB_DIR")  # local stand-in for the hub repo
+ARTIFACT_REFRESH = os.getenv("ARTIFACT_REFRESH", "false").lower() == "true"  # check the hub for a newer version
+ARTIFACT_VERSION = os.getenv("ARTIFACT_VERSION")  # pin a manifest version
+
 # 🟢 LOCAL ENVIRONMENT (load from local /model folder)
 if IS_LOCAL:
 
@@ -55,56 +105,65 @@ if IS_LOCAL:
         os.path.join(os.path.dirname(__file__), "..", "..")
     )
 
-    LOCAL_MODEL_DIR = os.path.join(PROJECT_ROOT, "model")
-
-    for key, filename in artifact_files.items():
-        artifact_paths[key] = os.path.join(LOCAL_MODEL_DIR, filename)
-    
+    MODEL_DIR = os.path.join(PROJECT_ROOT, "model")
 
 # 🔵 STREAMLIT CLOUD (download from HuggingFace)
 else:
-    try:
-        from huggingface_hub import hf_hub_download
+    @st.cache_resource
+    def fetch_model_dir() -> str:
+        """One verified artifact version per process, fetched in parallel into the local cache."""
+        from lib.artifacts import ArtifactCache, HfHub, LocalHub
 
-        for key, filename in artifact_files.items():
-            artifact_paths[key] = hf_hub_download(
-                repo_id=REPO_ID,
-                filename=filename,
-                token=hf_token
-            )
+        hub = LocalHub(ARTIFACT_HUB_DIR) if ARTIFACT_HUB_DIR else HfHub(REPO_ID, token=hf_token)
+        # The API holds the model; the API-backed page only reads the reference prices
+        names = None if PREDICT_MODE == "local" else [artifact_files["ref_avg"], "reference_cube.json"]
+        return ArtifactCache(ARTIFACT_CACHE_DIR).fetch(hub, names, refresh=ARTIFACT_REFRESH, version=ARTIFACT_VERSION)
 
+    try:
+        MODEL_DIR = fetch_model_dir()
     except Exception as e:
         st.error(f"❌ Failed to load model/artifacts from Hugging Face Hub: {e}")
         st.stop()
 
+# Optional files that aren't there are skipped by load_bundle
+for key, filename in {**artifact_files, **local_artifact_files}.items():
+    artifact_paths[key] = os.path.join(MODEL_DIR, filename)
+
+# Optional: hierarchical reference prices (build_reference_cube.py); older model repos have none
+ref_cube_path = os.path.join(MODEL_DIR, "reference_cube.json")
+if not os.path.exists(ref_cube_path):
+    ref_cube_path = None
+
 # --- Final paths used later in app ---
 model_path = artifact_paths["model"]
 features_path = artifact_paths["features"]
 freq_map_path = artifact_paths["freq_map"]
 ref_avg_path = artifact_paths["ref_avg"]
 
-# Load model
+# Load model (in-process mode only; the API holds its own copy otherwise)
 @st.cache_resource
 def load_model():
+    """Forest, encoder and calibration, loaded and validated exactly as the API loads them."""
     try:
-        with open(model_path, "rb") as f:
-            model = pickle.load(f)
-        return model
+        return load_bundle(
+            {
+                "model": model_path,
+                "forest": artifact_paths["forest"],
+                "schema": features_path,
+                "freq_maps": freq_map_path,
+                "tiers": artifact_paths["tiers"],
+                "conformal": artifact_paths["conformal"],
+                "explainer": artifact_paths["explainer"],
+            },
+            lambda: load_shap_explainer(artifact_paths["explainer"], model_path)
+        )
     except Exception as e:
         st.error(f"❌ Error loading model: {e}")
         return None
 
-model = load_model()  # Load the model
-
-st.write("Model loaded:", model is not None)  # Debug check
+model = load_model() if PREDICT_MODE == "local" else None
 
 # Load other artifacts
-with open(features_path, "r") as f:
-    FEATURE_COLUMNS = json.load(f)
-
-with open(freq_map_path, "r") as f:
-    FREQ_MAPS = json.load(f)
-
 with open(ref_avg_path, "r") as f:
     reference_averages = json.load(f)
 
@@ -116,12 +175,8 @@ reference_averages["propertytype"] = {
     k.strip().lower(): v for k, v in reference_averages.get("propertytype", {}).items()
 }
 
-# SHAP Compatibility
-FEATURE_COLUMNS = [str(col) for col in FEATURE_COLUMNS]
-
-@st.cache_resource
-def load_explainer(_model):
-    return shap.TreeExplainer(_model)
+# Most specific populated benchmark cell, one dict lookup per level (None: ZIP/type averages only)
+reference_cube = ReferenceCube.load(ref_cube_path) if ref_cube_path else None
 
 # --- load cities/states from your CSV ---
 @st.cache_data
@@ -313,50 +368,120 @@ with st.form("input_form"):
         )
 
     # Unified reference selection
-    ref_type = st.radio("Market Average Benchmark Reference Based On", ["ZIP Code", "Property Type"])
+    if reference_cube is not None:
+        # Cube level the search starts at; broader levels answer when it has too few listings.
+        # Property Type is a nationwide average, outside the geographic cube.
+        ref_levels = {"Most Specific Available": None, "ZIP Code": "zip", "City": "city", "State": "state"}
+        ref_type = st.radio("Market Benchmark Reference Based On", list(ref_levels) + ["Property Type"])
+    else:
+        ref_type = st.radio("Market Average Benchmark Reference Based On", ["ZIP Code", "Property Type"])
 
     submit = st.form_submit_button("📈 Predict Price")
 
-# Feature Preparation Function 
-def prepare_features_for_shap():
-    df = pd.DataFrame([{
-        "SQUAREFOOTAGE": square_footage,
-        "BEDROOMS": bedrooms,
-        "BATHROOMS": bathrooms,
-        "LATITUDE": latitude,
-        "LONGITUDE": longitude,
-        "CITY": city,
-        "STATE": state,
-        "ZIPCODE": zipcode,
-        "PROPERTYTYPE": propertytype,
-        "LISTEDDATE": pd.to_datetime(listed_date)
-    }])
-
-    df["LISTING_YEAR"] = df["LISTEDDATE"].dt.year
-    df["LISTING_MONTH"] = df["LISTEDDATE"].dt.month
-    df["LISTING_DAY"] = df["LISTEDDATE"].dt.day
-    df.drop(columns=["LISTEDDATE"], inplace=True)
-
-    for col in ["ZIPCODE", "CITY", "STATE"]:
-        freq_map = FREQ_MAPS.get(col, {})
-        df[col] = df[col].map(freq_map).fillna(0)
-
-    for col in FEATURE_COLUMNS:
-        if col.startswith("PROPERTYTYPE_"):
-            df[col] = 0
-    prop_col = f"PROPERTYTYPE_{propertytype}"
-    if prop_col in df.columns:
-        df[prop_col] = 1
-
-    df = df.reindex(columns=FEATURE_COLUMNS, fill_value=0)
-    df.columns = df.columns.astype(str)
-    return df
+# SHAP Bar Plot (contributions from the API's /explain)
+def plot_shap_contributions(features, contributions):
+    import matplotlib.pyplot as plt
+
+    order = sorted(range(len(features)), key=lambda i: abs(contributions[i]))
+    values = [contributions[i] for i in order]
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.barh(
+        [features[i] for i in order],
+        values,
+        color=["#ff0051" if v >= 0 else "#008bfb" for v in values]
+    )
+    ax.axvline(0, color="#999999", linewidth=0.8)
+    ax.set_xlabel("SHAP value (impact on predicted price, USD)")
+    fig.tight_layout()
+    return fig
+
+# What-If Sensitivity
+def build_what_if_grid(payload: dict) -> tuple:
+    """
+    Variants of the submitted listing: WHAT_IF_STEPS square footages from
+    half to one and a half times the input, for the input bedroom count and
+    one either side, plus the same listing in each month of its year.
+    Returns the records and, per curve, the x values and record slice.
+    """
+    if WHAT_IF_STEPS < 2:
+        raise ValueError(f"WHAT_IF_STEPS must be at least 2, got {WHAT_IF_STEPS}")
+    base_sqft = float(payload["square_footage"])
+    low, high = max(100.0, 0.5 * base_sqft), 1.5 * base_sqft
+    sqft_steps = [round(low + (high - low) * i / (WHAT_IF_STEPS - 1), 1) for i in range(WHAT_IF_STEPS)]
+    bedroom_counts = sorted({max(0, int(payload["bedrooms"]) + d) for d in (-1, 0, 1)})
+
+    records, curves = [], {}
+    for beds in bedroom_counts:
+        start = len(records)
+        records += [{**payload, "square_footage": sqft, "bedrooms": beds} for sqft in sqft_steps]
+        curves[f"{beds} bed"] = (sqft_steps, slice(start, len(records)))
+
+    listed = datetime.fromisoformat(payload["listed_date"]).date()
+    months = list(range(1, 13))
+    start = len(records)
+    # Same day of the month, clamped only in months too short for it
+    days = [min(listed.day, monthrange(listed.year, m)[1]) for m in months]
+    records += [
+        {**payload, "listed_date": listed.replace(month=m, day=d).isoformat()} for m, d in zip(months, days)
+    ]
+    curves["month"] = (months, slice(start, len(records)))
+    return records, curves
+
+def score_what_if(records: list) -> list:
+    """The whole grid in one scoring call: in-process, or one /predict/batch round trip."""
+    if model is not None:
+        return scoring.score_records(model, records, tier=PREDICT_TIER)
+    return get_api_client().predict_batch(records, tier=PREDICT_TIER)
+
+def add_band(fig, x, results, name, color, **trace):
+    import plotly.graph_objects as go
+
+    lower = [r["confidence_interval_90"]["lower_bound"] for r in results]
+    upper = [r["confidence_interval_90"]["upper_bound"] for r in results]
+    fig.add_trace(go.Scatter(
+        x=list(x) + list(x)[::-1], y=upper + lower[::-1], fill="toself", fillcolor=color,
+        opacity=0.15, line={"width": 0}, hoverinfo="skip", showlegend=False, **trace
+    ))
+    fig.add_trace(go.Scatter(
+        x=list(x), y=[r["predicted_price"] for r in results], mode="lines", name=name,
+        line={"color": color}, **trace
+    ))
+
+def plot_what_if(payload: dict, results: list, curves: dict) -> tuple:
+    import plotly.graph_objects as go
+
+    colors = ["#008bfb", "#2a9df4", "#ff0051"]
+    sqft_fig = go.Figure()
+    for (name, (x, rows)), color in zip([c for c in curves.items() if c[0] != "month"], colors):
+        add_band(sqft_fig, x, results[rows], name, color)
+    sqft_fig.add_vline(x=payload["square_footage"], line_dash="dot", line_color="#999999")
+    sqft_fig.update_layout(
+        title="Price vs Square Footage (90% interval bands)",
+        xaxis_title="Square Footage", yaxis_title="Predicted Price (USD)", hovermode="x unified"
+    )
+
+    months, rows = curves["month"]
+    month_fig = go.Figure()
+    add_band(month_fig, months, results[rows], "Listing month", "#2a9df4")
+    month_fig.add_vline(x=datetime.fromisoformat(payload["listed_date"]).month, line_dash="dot", line_color="#999999")
+    month_fig.update_layout(
+        title="Price vs Listing Month", xaxis={"title": "Month", "dtick": 1},
+        yaxis_title="Predicted Price (USD)", showlegend=False
+    )
+    return sqft_fig, month_fig
+
+# Results of the last submission, kept across the reruns that opening a panel triggers
+def for_submission(key: str, compute):
+    """compute() once per submission; later reruns reuse the stored value."""
+    results = st.session_state.PREDICT_RESULTS
+    if key not in results:
+        results[key] = compute()
+    return results[key]
 
 # Prediction Logic 
 if submit:
-    st.info("⏳ Making prediction...")
-
-    payload = {
+    st.session_state.PREDICT_PAYLOAD = {
         "square_footage": square_footage,
         "bedrooms": bedrooms,
         "bathrooms": bathrooms,
@@ -368,27 +493,57 @@ if submit:
         "propertytype": propertytype,
         "listed_date": listed_date.isoformat()
     }
-    
+    st.session_state.PREDICT_RESULTS = {}
+
+payload = st.session_state.get("PREDICT_PAYLOAD")
+if payload is not None:
+    # City/State sit outside the form and may have changed since the submit
+    city, state = payload["city"], payload["state"]
+
     try:
-        response = requests.post("https://kl8fjd4z-8000.uks1.devtunnels.ms/predict", json=payload) 
-        result = response.json()
+        def predict():
+            if model is not None:
+                return scoring.score_records(model, [payload], tier=PREDICT_TIER)[0]
+            return get_api_client().predict(payload, tier=PREDICT_TIER)
+
+        if submit:
+            st.info("⏳ Making prediction...")
+        result = for_submission("predict", predict)
 
         pred = result["predicted_price"]
         ci = result["confidence_interval_90"]
 
-        st.success("✅ Prediction completed!")
+        if submit:
+            st.success("✅ Prediction completed!")
 
         # --- Unified reference logic ---
-        if ref_type == "ZIP Code":
+        reference_note = None
+        if reference_cube is not None and ref_type != "Property Type":
+            ref = reference_cube.lookup(zipcode, propertytype, bedrooms, city, state, ref_levels[ref_type])
+            band = bedroom_band(bedrooms)
+            beds = f"{band}+" if band == BEDROOM_BANDS[-1] else str(band)
+            label = {
+                "zip_type_beds": f"{beds}-Bed {propertytype} in ZIP {zipcode} Median Price",
+                "zip_type": f"{propertytype} in ZIP {zipcode} Median Price",
+                "zip": f"ZIP Code {zipcode} Median Price",
+                "city": f"{city}, {state} Median Price",
+                "state": f"{state} Median Price",
+                "global": "All Listings Median Price",
+            }[ref["level"]]
+            reference_value = ref["median"]
+            reference_note = f"Based on {ref['count']:,} listings (mean ${ref['mean']:,.0f})."
+        elif ref_type == "ZIP Code":
             reference_value = reference_averages["zipcode"].get(zipcode, pred)
-            label = f"ZIP Code {zipcode}"
+            label = f"ZIP Code {zipcode} Avg Price"
         else:
             reference_value = reference_averages["propertytype"].get(propertytype.lower(), pred)
-            label = f"{propertytype} Average"
+            label = f"{propertytype} Average Avg Price"
 
         delta = pred - reference_value
         st.subheader("📊 Market Reference Comparison")
-        st.metric(label=f"{label} Avg Price", value=f"${reference_value:,.0f}", delta=f"${delta:,.0f}")
+        st.metric(label=label, value=f"${reference_value:,.0f}", delta=f"${delta:,.0f}")
+        if reference_note:
+            st.caption(reference_note)
 
         # --- Estimated Price Display ---
         st.markdown(f"""
@@ -400,6 +555,7 @@ if submit:
         """, unsafe_allow_html=True)
 
         # --- Gauge Chart ---
+        import plotly.graph_objects as go
         fig = go.Figure(go.Indicator(
             mode="gauge+number+delta",
             value=pred,
@@ -417,27 +573,46 @@ if submit:
         st.plotly_chart(fig, width='stretch')
 
         # --- SHAP Explanation ---
-        if ENABLE_SHAP:
-            if model is None:
-                st.error("Model not loaded. SHAP explainability not available.")
-            else:
-                with st.expander("🔍 Show SHAP Feature Impact (Explainability)", expanded=False):
-                    try:
-                        explainer = load_explainer(model)
-
-                        # Prepare input for SHAP
-                        X = prepare_features_for_shap()
-                        shap_values = explainer(X)
-
-                        st.subheader("SHAP Feature Importance (Bar Plot)")
-                        fig, ax = plt.subplots(figsize=(10, 6))
-                        shap.plots.bar(shap_values, max_display=len(FEATURE_COLUMNS), show=False)
-                        st.pyplot(fig)
-
-                    except Exception as e:
-                        st.error(f"SHAP Feature Importance plot failed: {e}")
-
-    except requests.exceptions.RequestException as e:
+        # Panels run only when switched on (an expander's body runs even while collapsed)
+        if ENABLE_SHAP and st.toggle("🔍 Show SHAP Feature Impact (Explainability)", key="SHOW_SHAP"):
+            with st.container(border=True):
+                try:
+                    def explain():
+                        explainer = model.explainer() if model is not None else None
+                        if explainer is not None:
+                            return {
+                                "features": model.encoder.columns,
+                                "explanations": scoring.explain_rows(explainer, model.encoder.encode([payload])),
+                            }
+                        return get_api_client().explain(payload)
+
+                    explained = for_submission("explain", explain)
+                    contributions = explained["explanations"][0]["contributions"]
+
+                    st.subheader("SHAP Feature Importance (Bar Plot)")
+                    st.pyplot(plot_shap_contributions(explained["features"], contributions))
+
+                except Exception as e:
+                    st.error(f"SHAP Feature Importance plot failed: {e}")
+
+        # --- What-If Sensitivity ---
+        if ENABLE_WHAT_IF and st.toggle("📉 What-If Sensitivity (Square Footage, Bedrooms, Listing Month)",
+                                        key="SHOW_WHAT_IF"):
+            with st.container(border=True):
+                try:
+                    records, curves = build_what_if_grid(payload)
+                    scored = for_submission("what_if", lambda: score_what_if(records))
+                    sqft_fig, month_fig = plot_what_if(payload, scored, curves)
+                    st.plotly_chart(sqft_fig, width='stretch')
+                    st.plotly_chart(month_fig, width='stretch')
+                    st.caption(f"{len(records)} variants of this listing, scored in one batch.")
+
+                except Exception as e:
+                    st.error(f"What-if sensitivity failed: {e}")
+
+    except ApiUnavailable as e:
+        st.error(f"❌ Pricing service unavailable: {e}")
+    except ApiError as e:
         st.error(f"❌ Failed to get prediction: {e}")
     except Exception as e:
         st.error(f"⚠️ Unexpected error: {str(e)}")
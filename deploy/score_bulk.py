@@ -0,0 +1,154 @@
+"""
+Score a whole listings file offline, without going through HTTP.
+
+    python score_bulk.py [input.csv] [--output scored.parquet] [--workers 4]
+
+Reads the input (model/cleaned_data.csv by default, or a Snowflake extract
+such as RENT_extract.csv) in chunks, scores each chunk with the feature
+encoder and forest from inference.py across a pool of forked processes and
+writes the input columns plus predicted_price, lower_bound_90,
+upper_bound_90 and error to CSV or Parquet (by output extension). The model
+is loaded once before forking, so workers share it rather than each
+loading a copy. Rows that fail validation keep empty predictions and say
+why in `error`.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+import inference
+from lib.scoring import tree_pred_bounds
+from lib.streaming import normalize_record
+
+DEFAULT_INPUT = os.path.join(inference.BASE_DIR, "..", "model", "cleaned_data.csv")
+RESULT_COLUMNS = ["predicted_price", "lower_bound_90", "upper_bound_90", "error"]
+
+
+def score_chunk(chunk: pd.DataFrame, tier: str = "full") -> pd.DataFrame:
+    """Input rows with prediction, 90% interval and validation error columns added."""
+    requests, valid = [], []
+    errors = [None] * len(chunk)
+    for i, raw in enumerate(chunk.to_dict("records")):
+        try:
+            requests.append(inference.PricingRequest.model_validate(normalize_record(raw)))
+            valid.append(i)
+        except ValidationError as e:
+            errors[i] = inference.describe_validation_error(e)
+
+    bounds = np.full((3, len(chunk)), np.nan)
+    if requests:
+        X = inference.prepare_features_batch(requests)
+        bounds[:, valid] = np.round(tree_pred_bounds(inference.predict_trees(X, tier)), 2)
+
+    out = chunk.copy()
+    out["predicted_price"], out["lower_bound_90"], out["upper_bound_90"] = bounds
+    out["error"] = errors
+    return out
+
+
+class Writer:
+    """Appends scored chunks to one CSV or Parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.parquet = path.lower().endswith((".parquet", ".pq"))
+        self._parquet_writer = None
+        self._wrote_csv = False
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Parquet output needs pyarrow (pip install pyarrow); or write .csv")
+
+    def write(self, frame: pd.DataFrame):
+        if not self.parquet:
+            frame.to_csv(self.path, mode="a" if self._wrote_csv else "w", header=not self._wrote_csv, index=False)
+            self._wrote_csv = True
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Later chunks can infer different dtypes (e.g. an all-empty column)
+            table = pa.Table.from_pandas(frame, schema=self._parquet_writer.schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def read_chunks(path: str, chunk_rows: int):
+    # ZIP codes stay strings so leading zeros survive
+    return pd.read_csv(path, chunksize=chunk_rows, dtype={"ZIPCODE": str, "zipcode": str})
+
+
+def run(input_path: str, writer: Writer, workers: int, chunk_rows: int, tier: str = "full") -> dict:
+    rows = failed = 0
+    start = time.perf_counter()
+
+    def collect(scored: pd.DataFrame):
+        nonlocal rows, failed
+        writer.write(scored)
+        rows += len(scored)
+        failed += int(scored["error"].notna().sum())
+        print(f"  {rows:>10,} rows  {rows / (time.perf_counter() - start):>9,.0f} rows/s", flush=True)
+
+    if workers <= 1:
+        for chunk in read_chunks(input_path, chunk_rows):
+            collect(score_chunk(chunk, tier))
+    else:
+        # Forked workers inherit the loaded (memory-mapped) forest and encoder
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            in_flight = deque()
+            for chunk in read_chunks(input_path, chunk_rows):
+                # Bounded read-ahead keeps memory flat however large the input is
+                if len(in_flight) >= 2 * workers:
+                    collect(in_flight.popleft().get())
+                in_flight.append(pool.apply_async(score_chunk, (chunk, tier)))
+            while in_flight:
+                collect(in_flight.popleft().get())
+
+    return {"rows": rows, "failed": failed, "seconds": time.perf_counter() - start}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help="CSV of listings to score")
+    parser.add_argument("--output", help="output .csv or .parquet (default: <input>_scored.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="scoring processes")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="rows per chunk")
+    parser.add_argument("--tier", choices=["full", "fast"], default="full", help="forest tier (see build_tiers.py)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + "_scored.csv"
+    writer = Writer(output)
+
+    t0 = time.perf_counter()
+    inference.warm_up()
+    tier = inference.resolve_tier(args.tier)
+    print(f"Model loaded in {time.perf_counter() - t0:.1f}s; scoring {args.input} with the {tier} forest, "
+          f"{args.workers} worker(s), {args.chunk_rows} rows per chunk")
+
+    try:
+        result = run(args.input, writer, args.workers, args.chunk_rows, tier)
+    finally:
+        writer.close()
+
+    rate = result["rows"] / result["seconds"] if result["seconds"] else 0.0
+    print(f"Scored {result['rows']:,} rows ({result['failed']:,} failed validation) in {result['seconds']:.1f}s: "
+          f"{rate:,.0f} rows/s, {rate / max(args.workers, 1):,.0f} rows/s per worker")
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
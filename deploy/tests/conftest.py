@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests import the app's modules the way the scripts in deploy/ do (from lib.x import ...)
+DEPLOY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DEPLOY_DIR)
@@ -0,0 +1,127 @@
+import asyncio
+import math
+import time
+
+import pytest
+
+from lib.admission import AdmissionController, DeadlineExceeded, Overloaded
+
+
+async def hold(controller, release: asyncio.Event, deadline=None):
+    async with controller.slot(deadline):
+        await release.wait()
+
+
+async def settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+def test_full_queue_is_shed_immediately():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=2, max_wait_s=5)
+        release = asyncio.Event()
+        holders = [asyncio.create_task(hold(controller, release)) for _ in range(3)]
+        await settle()
+        assert (controller.active, controller.queued) == (1, 2)
+
+        with pytest.raises(Overloaded) as shed:
+            async with controller.slot():
+                pass
+        assert shed.value.reason == "queue full"
+        with pytest.raises(Overloaded):
+            controller.check()
+
+        release.set()
+        await asyncio.gather(*holders)
+        return controller.stats()
+
+    stats = asyncio.run(main())
+    assert stats["admitted"] == 3
+    assert stats["rejected"] == {"queue_full": 2, "queue_timeout": 0, "deadline": 0}
+    assert (stats["active"], stats["queued"]) == (0, 0)
+
+
+def test_queue_bound_holds_while_a_slot_is_being_handed_over():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait_s=5)
+        # A slot is free but a caller is already waiting for it: newcomers queue behind it
+        controller._waiters.append(asyncio.get_running_loop().create_future())
+        assert controller.active == 0
+        with pytest.raises(Overloaded):
+            controller.check()
+        with pytest.raises(Overloaded):
+            async with controller.slot():
+                pass
+
+    asyncio.run(main())
+
+
+def test_retry_after_follows_the_backlog():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=3, max_wait_s=5)
+        assert controller.retry_after() == 1  # nothing measured yet
+
+        start = time.perf_counter()
+        async with controller.slot():
+            await asyncio.sleep(0.3)
+        service = time.perf_counter() - start
+
+        release = asyncio.Event()
+        holders = [asyncio.create_task(hold(controller, release)) for _ in range(4)]
+        await settle()
+        with pytest.raises(Overloaded) as shed:
+            controller.check()
+        release.set()
+        await asyncio.gather(*holders)
+        return shed.value.retry_after, service
+
+    retry_after, service = asyncio.run(main())
+    # Three queued jobs plus this one, each taking about `service` on one slot
+    assert retry_after == max(1, math.ceil(4 * service))
+
+
+def test_expired_deadline_is_rejected_before_queueing():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_s=5)
+        with pytest.raises(DeadlineExceeded):
+            async with controller.slot(deadline=time.monotonic() - 0.01):
+                pass
+        return controller.stats()
+
+    stats = asyncio.run(main())
+    assert stats["rejected"]["deadline"] == 1
+    assert stats["admitted"] == 0
+
+
+def test_deadline_passing_in_the_queue_is_rejected_and_dequeued():
+    async def main():
+        controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_s=5)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, release))
+        await settle()
+
+        with pytest.raises(DeadlineExceeded):
+            async with controller.slot(deadline=time.monotonic() + 0.05):
+                pass
+        assert controller.queued == 0
+
+        # A job that waits past max_wait without a deadline is shed instead
+        controller.max_wait = 0.05
+        with pytest.raises(Overloaded) as shed:
+            async with controller.slot():
+                pass
+        release.set()
+        await holder
+        return controller.stats(), shed.value.reason
+
+    stats, reason = asyncio.run(main())
+    assert reason == "queue wait exceeded"
+    assert stats["rejected"] == {"queue_full": 0, "queue_timeout": 1, "deadline": 1}
+
+
+def test_expire_counts_deadlines_missed_outside_the_controller():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, max_wait_s=1)
+    with pytest.raises(DeadlineExceeded):
+        controller.expire()
+    assert controller.stats()["rejected"]["deadline"] == 1
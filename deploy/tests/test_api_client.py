@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lib import api_client
+from lib.api_client import ApiError, ApiUnavailable, CircuitBreaker, PricingApiClient
+
+
+class ScriptedApi:
+    """Local HTTP server answering each request with the next (status, headers) in `script`."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                api.calls += 1
+                status, headers = api.script.pop(0) if api.script else (200, {})
+                body = json.dumps({"detail": "busy"} if status >= 400 else {"predicted_price": 1.0}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Sleeps the retry policy asks for, recorded instead of slept."""
+    recorded = []
+    monkeypatch.setattr(api_client.time, "sleep", recorded.append)
+    return recorded
+
+
+def scripted(script, **client_kwargs):
+    api = ScriptedApi(script)
+    client = PricingApiClient(api.url, **client_kwargs)
+    return api, client
+
+
+def test_503_with_retry_after_is_retried(sleeps):
+    api, client = scripted([(503, {"Retry-After": "2"})])
+    try:
+        assert client.predict({}) == {"predicted_price": 1.0}
+    finally:
+        api.close()
+    assert api.calls == 2
+    assert sleeps == [2.0]
+    assert client.breaker.state == "closed"
+
+
+def test_503_without_retry_after_is_not_retried(sleeps):
+    api, client = scripted([(503, {})])
+    try:
+        with pytest.raises(ApiError) as error:
+            client.predict({})
+    finally:
+        api.close()
+    assert error.value.status == 503
+    assert api.calls == 1 and sleeps == []
+    # A missing optional feature says nothing about the API's health
+    assert client.breaker._failures == 0
+
+
+def test_retry_sleeps_stop_at_the_wait_budget(sleeps):
+    # Budget is the read timeout (1s); the server asks for 5s every time
+    api, client = scripted([(503, {"Retry-After": "5"})] * 10, read_timeout=1.0, retries=5)
+    try:
+        with pytest.raises(ApiError) as error:
+            client.predict({})
+    finally:
+        api.close()
+    assert error.value.status == 503
+    assert sleeps == [1.0]
+    assert api.calls == 2
+    assert client.breaker._failures == 1
+
+
+def test_breaker_opens_then_lets_a_single_trial_through():
+    breaker = CircuitBreaker(failure_threshold=3, reset_after_s=0.05)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in() <= 0.05
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial call while half-open
+
+    # A failed trial re-opens immediately, without counting up to the threshold again
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_fails_calls_without_reaching_the_api(sleeps):
+    api, client = scripted([(502, {})] * 3, retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_after_s=60))
+    try:
+        for _ in range(3):
+            with pytest.raises(ApiError):
+                client.predict({})
+        with pytest.raises(ApiUnavailable):
+            client.predict({})
+    finally:
+        api.close()
+    assert api.calls == 3
+    assert client.breaker.state == "open"
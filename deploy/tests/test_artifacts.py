@@ -0,0 +1,154 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+from lib import artifacts
+from lib.artifacts import MANIFEST_NAME, REQUIRED_FILES, ArtifactCache, ArtifactError, LocalHub, publish
+
+
+def write_artifacts(model_dir, **contents):
+    """The required artifacts in `model_dir`, with `contents` overriding or adding files."""
+    os.makedirs(model_dir, exist_ok=True)
+    files = {name: f"{name} v1\n" for name in REQUIRED_FILES}
+    files.update(contents)
+    for name, text in files.items():
+        with open(os.path.join(model_dir, name), "w") as f:
+            f.write(text)
+
+
+def read(path):
+    with open(path, "r") as f:
+        return f.read()
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    path = str(tmp_path / "model")
+    write_artifacts(path)
+    return path
+
+
+@pytest.fixture
+def hub(tmp_path):
+    return LocalHub(str(tmp_path / "hub"))
+
+
+@pytest.fixture
+def cache_root(tmp_path):
+    artifacts._VERIFIED.clear()
+    return str(tmp_path / "cache")
+
+
+def test_republish_skips_unchanged_files(model_dir, hub):
+    first = publish(hub, model_dir)
+    assert sorted(first["uploaded"]) == sorted(REQUIRED_FILES)
+    assert first["previous_version"] is None
+
+    again = publish(hub, model_dir)
+    assert again["uploaded"] == []
+    assert again["version"] == first["version"]
+
+    write_artifacts(model_dir, **{"features_schema.json": "features_schema.json v2\n"})
+    changed = publish(hub, model_dir)
+    assert changed["uploaded"] == ["features_schema.json"]
+    assert changed["previous_version"] == first["version"]
+    assert hub.read_manifest()["version"] == changed["version"] != first["version"]
+
+
+def test_fetch_downloads_in_parallel_into_blobs(model_dir, hub, cache_root):
+    manifest = publish(hub, model_dir)
+    # Two downloads have to be in flight at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    download = hub.download
+
+    def download_together(name, dest):
+        barrier.wait()
+        download(name, dest)
+
+    hub.download = download_together
+    version_dir = ArtifactCache(cache_root, max_workers=2).fetch(hub)
+
+    blobs = os.listdir(os.path.join(cache_root, "blobs"))
+    assert sorted(blobs) == sorted(e["sha256"] for e in hub.read_manifest()["files"].values())
+    assert os.path.basename(version_dir) == manifest["version"]
+    for name in REQUIRED_FILES:
+        assert read(os.path.join(version_dir, name)) == f"{name} v1\n"
+
+
+def test_warm_restart_needs_no_hub(model_dir, hub, cache_root):
+    publish(hub, model_dir)
+    first = ArtifactCache(cache_root).fetch(hub)
+    shutil.rmtree(hub.root)
+
+    artifacts._VERIFIED.clear()  # a new process hashes its cached files again
+    again = ArtifactCache(cache_root).fetch(hub)
+    assert again == first
+    for name in REQUIRED_FILES:
+        assert read(os.path.join(again, name)) == f"{name} v1\n"
+
+
+def test_tampered_files_are_rejected(model_dir, hub, cache_root):
+    publish(hub, model_dir)
+    cache = ArtifactCache(cache_root)
+    entry = hub.read_manifest()["files"]["frequency_maps.json"]
+
+    # Same size, different content: only the checksum tells
+    with open(os.path.join(hub.root, "frequency_maps.json"), "w") as f:
+        f.write("frequency_maps.json v9\n")
+    with pytest.raises(ArtifactError, match="checksum"):
+        cache.fetch(hub)
+    assert not os.path.exists(cache.blob_path(entry["sha256"]))
+
+    write_artifacts(hub.root)
+    version_dir = cache.fetch(hub)
+
+    # A blob corrupted in the cache is noticed by the next process and fetched again
+    with open(cache.blob_path(entry["sha256"]), "w") as f:
+        f.write("frequency_maps.json v9\n")
+    artifacts._VERIFIED.clear()
+    assert ArtifactCache(cache_root).fetch(hub) == version_dir
+    assert read(os.path.join(version_dir, "frequency_maps.json")) == "frequency_maps.json v1\n"
+
+
+def test_refresh_and_version_pinning(model_dir, hub, cache_root):
+    v1 = publish(hub, model_dir)["version"]
+    cache = ArtifactCache(cache_root)
+    assert os.path.basename(cache.fetch(hub)) == v1
+
+    write_artifacts(model_dir, **{"reference_averages.json": "reference_averages.json v2\n"})
+    v2 = publish(hub, model_dir)["version"]
+
+    # The cached manifest answers until a refresh is asked for
+    assert os.path.basename(cache.fetch(hub)) == v1
+    assert os.path.basename(cache.fetch(hub, refresh=True)) == v2
+    assert cache.cached_manifest()["version"] == v2
+
+    assert os.path.basename(cache.fetch(hub, version=v2)) == v2
+    # A local hub keeps only its latest version
+    with pytest.raises(ArtifactError, match=v1):
+        cache.fetch(hub, version=v1)
+
+    os.remove(os.path.join(hub.root, MANIFEST_NAME))
+    with pytest.raises(ArtifactError, match="not published"):
+        cache.fetch(hub, version="0123456789ab")
+
+
+def test_named_fetch_downloads_only_those_files(model_dir, hub, cache_root):
+    write_artifacts(model_dir, **{"reference_cube.json": "reference_cube.json v1\n"})
+    publish(hub, model_dir)
+    downloaded = []
+    download = hub.download
+
+    def record(name, dest):
+        downloaded.append(name)
+        download(name, dest)
+
+    hub.download = record
+    # An optional file the hub doesn't have is skipped
+    version_dir = ArtifactCache(cache_root).fetch(hub, ["reference_averages.json", "reference_cube.json", "shap_explainer.pkl"])
+
+    assert sorted(downloaded) == ["reference_averages.json", "reference_cube.json"]
+    assert sorted(os.listdir(version_dir)) == ["reference_averages.json", "reference_cube.json"]
+    assert "randomforest_tuned_model.pkl" not in downloaded
@@ -0,0 +1,68 @@
+import asyncio
+
+from lib.batcher import MicroBatcher
+
+
+class Recorder:
+    """score_batch stand-in: remembers each batch and doubles every item."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, items):
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_batches_are_cut_at_max_size():
+    score = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(score, window_ms=50, max_batch_size=3)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+
+    assert asyncio.run(main()) == [i * 2 for i in range(7)]
+    assert [len(b) for b in score.batches] == [3, 3, 1]
+    assert sorted(i for b in score.batches for i in b) == list(range(7))
+
+
+def test_partial_batch_flushes_when_window_ends():
+    score = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(score, window_ms=20, max_batch_size=64)
+        result = await asyncio.wait_for(batcher.submit(5), timeout=2)
+        return result, batcher.stats()
+
+    result, stats = asyncio.run(main())
+    assert result == 10
+    assert score.batches == [[5]]
+    assert stats["batches"] == 1 and stats["requests"] == 1
+
+
+def test_cancelled_caller_does_not_drop_the_rest_of_its_batch():
+    score = Recorder()
+
+    async def main():
+        batcher = MicroBatcher(score, window_ms=30, max_batch_size=64)
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(4)]
+        await asyncio.sleep(0)  # every caller is queued
+        tasks[1].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[1], asyncio.CancelledError)
+    assert [results[i] for i in (0, 2, 3)] == [0, 4, 6]
+    # The cancelled caller is left out of the scored batch
+    assert score.batches == [[0, 2, 3]]
+
+
+def test_scoring_error_reaches_every_caller():
+    def fail(items):
+        raise RuntimeError("forest unavailable")
+
+    async def main():
+        batcher = MicroBatcher(fail, window_ms=10, max_batch_size=64)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from lib.cache import PredictionCache, row_keys
+
+
+def test_keys_depend_on_interval_tier_and_model_version():
+    X = np.array([[1600.0, 3, 2, 30.37, -97.70], [900.0, 1, 1, 30.0, -97.0]])
+    base = row_keys(X, "trees", "full", "v1")
+
+    assert len(base) == 2 and base[0] != base[1]
+    assert row_keys(X.copy(), "trees", "full", "v1") == base
+    for other in (("conformal", "full", "v1"), ("trees", "fast", "v1"), ("trees", "full", "v2")):
+        assert not set(row_keys(X, *other)) & set(base)
+
+
+def test_keys_are_the_float64_row():
+    # The same values given as ints or float32 are the same forest input
+    assert row_keys(np.array([[3, 2]]), "v1") == row_keys(np.array([[3.0, 2.0]], dtype=np.float32), "v1")
+    assert row_keys(np.array([[3.0, 2.0]]), "v1") != row_keys(np.array([[3.0, 2.5]]), "v1")
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0.05)
+    cache.put_many([b"a", b"b"], [1, 2])
+    assert cache.get_many([b"a", b"b", b"c"]) == [1, 2, None]
+
+    time.sleep(0.1)
+    assert cache.get_many([b"a", b"b"]) == [None, None]
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put_many([b"a", b"b"], [1, 2])
+    cache.get_many([b"a"])
+    cache.put_many([b"c"], [3])
+    assert cache.get_many([b"a", b"b", b"c"]) == [1, None, 3]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_changed_watched_file_empties_the_cache(tmp_path):
+    path = tmp_path / "model.pkl"
+    path.write_text("v1")
+    cache = PredictionCache(max_entries=10, ttl_seconds=60, watch_paths=[str(path)], check_interval=0)
+    cache.put_many([b"a"], [1])
+    assert cache.get_many([b"a"]) == [1]
+
+    path.write_text("v2, a different size")
+    assert cache.get_many([b"a"]) == [None]
+    assert cache.stats()["invalidations"] == 1
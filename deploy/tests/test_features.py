@@ -0,0 +1,94 @@
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.features import FeatureEncoder
+
+COLUMNS = [
+    "SQUAREFOOTAGE", "BEDROOMS", "BATHROOMS", "LATITUDE", "LONGITUDE", "CITY", "STATE", "ZIPCODE",
+    "PROPERTYTYPE_Apartment", "PROPERTYTYPE_Condo", "PROPERTYTYPE_Manufactured", "PROPERTYTYPE_Multi-Family",
+    "PROPERTYTYPE_Single Family", "PROPERTYTYPE_Townhouse", "LISTING_YEAR", "LISTING_MONTH", "LISTING_DAY",
+]
+FREQ_MAPS = {
+    "CITY": {"Austin": 0.12, "Dallas": 0.08},
+    "STATE": {"TX": 0.4, "CA": 0.3},
+    "ZIPCODE": {"78758": 0.01, "02134": 0.002},
+}
+
+
+def legacy_encode(request: dict, columns: list, freq_maps: dict) -> np.ndarray:
+    """The pandas prepare_features FeatureEncoder replaced, kept as the reference."""
+    df = pd.DataFrame([{
+        "SQUAREFOOTAGE": request["square_footage"],
+        "BEDROOMS": request["bedrooms"],
+        "BATHROOMS": request["bathrooms"],
+        "LATITUDE": request["latitude"],
+        "LONGITUDE": request["longitude"],
+        "CITY": request["city"],
+        "STATE": request["state"],
+        "ZIPCODE": request["zipcode"],
+        "PROPERTYTYPE": request["propertytype"],
+        "LISTEDDATE": pd.to_datetime(request["listed_date"])
+    }])
+
+    df["LISTING_YEAR"] = df["LISTEDDATE"].dt.year
+    df["LISTING_MONTH"] = df["LISTEDDATE"].dt.month
+    df["LISTING_DAY"] = df["LISTEDDATE"].dt.day
+    df.drop(columns=["LISTEDDATE"], inplace=True)
+
+    for col in ["ZIPCODE", "CITY", "STATE"]:
+        df[col] = df[col].map(freq_maps.get(col, {})).fillna(0)
+
+    for col in columns:
+        if col.startswith("PROPERTYTYPE_"):
+            df[col] = 0
+    prop_col = f"PROPERTYTYPE_{request['propertytype']}"
+    if prop_col in df.columns:
+        df[prop_col] = 1
+
+    return df.reindex(columns=columns, fill_value=0).to_numpy(dtype=np.float64)[0]
+
+
+def request(**overrides) -> dict:
+    fields = {
+        "square_footage": 1600.0, "bedrooms": 3, "bathrooms": 2.0, "latitude": 30.37, "longitude": -97.70,
+        "city": "Austin", "state": "TX", "zipcode": "78758", "propertytype": "Condo",
+        "listed_date": date(2025, 12, 1),
+    }
+    fields.update(overrides)
+    return fields
+
+
+REQUESTS = [
+    request(),
+    request(propertytype="Single Family", listed_date="2024-02-29", bathrooms=2.5),
+    request(city="Nowhere"),                       # unseen city
+    request(propertytype="Castle"),                # unseen property type
+    request(zipcode="2134", state="CA"),           # ZIP without its leading zero
+    request(zipcode="02134", state="CA", bedrooms=0, square_footage=350.5),
+]
+
+
+@pytest.mark.parametrize("columns, freq_maps", [
+    (COLUMNS, FREQ_MAPS),
+    # Optional inputs absent: no LISTING_DAY column, no STATE frequency map
+    ([c for c in COLUMNS if c != "LISTING_DAY"], {k: v for k, v in FREQ_MAPS.items() if k != "STATE"}),
+])
+def test_encoder_matches_pandas_encoding(columns, freq_maps):
+    encoder = FeatureEncoder(columns, freq_maps)
+    expected = np.vstack([legacy_encode(r, columns, freq_maps) for r in REQUESTS])
+
+    np.testing.assert_array_equal(encoder.encode(REQUESTS), expected)
+    np.testing.assert_array_equal(encoder.encode_one(REQUESTS[0]), expected[:1])
+    # Pydantic-style objects (attributes instead of keys) encode the same
+    np.testing.assert_array_equal(encoder.encode([SimpleNamespace(**r) for r in REQUESTS]), expected)
+
+
+def test_unseen_categories_encode_as_zero():
+    encoder = FeatureEncoder(COLUMNS, FREQ_MAPS)
+    row = dict(zip(COLUMNS, encoder.encode_one(request(city="Nowhere", zipcode="2134", propertytype="Castle"))[0]))
+    assert row["CITY"] == 0 and row["ZIPCODE"] == 0
+    assert all(row[c] == 0 for c in COLUMNS if c.startswith("PROPERTYTYPE_"))
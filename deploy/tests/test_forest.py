@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from lib.forest import CompiledForest
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6)) * [1.0, 10.0, 100.0, 0.01, 1e4, 3.0]
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + X[:, 2] / 50 + rng.normal(scale=0.1, size=400)
+    model = RandomForestRegressor(n_estimators=12, max_depth=8, random_state=0).fit(X, y)
+    return model, X
+
+
+def on_thresholds(model, X):
+    """Rows whose split feature sits exactly on a float32-rounded threshold of some node."""
+    rows = []
+    for est in model.estimators_[:3]:
+        tree = est.tree_
+        for node in np.flatnonzero(tree.children_left >= 0)[:20]:
+            row = X[node % len(X)].copy()
+            row[tree.feature[node]] = np.float32(tree.threshold[node])
+            rows.append(row)
+    return np.array(rows)
+
+
+def per_tree(model, X):
+    return np.column_stack([est.predict(X.astype(np.float32)) for est in model.estimators_])
+
+
+@pytest.mark.parametrize("float32", [False, True])
+def test_round_trip_matches_sklearn_exactly(fitted, tmp_path, float32):
+    model, X = fitted
+    path = str(tmp_path / "model.forest")
+    CompiledForest.from_sklearn(model).save(path, float32=float32)
+    forest = CompiledForest.load(path)
+
+    rows = np.vstack([X, on_thresholds(model, X)])
+    expected = per_tree(model, rows)
+    tree_preds = forest.predict_trees(rows)
+    if float32:
+        # Leaf values are stored in single precision; the leaf reached must still be the same
+        np.testing.assert_array_equal(tree_preds, expected.astype(np.float32))
+    else:
+        np.testing.assert_array_equal(tree_preds, expected)
+        np.testing.assert_array_equal(forest.predict(rows), expected.mean(axis=1))
+
+
+def test_predict_matches_forest_mean(fitted):
+    model, X = fitted
+    forest = CompiledForest.from_sklearn(model)
+    np.testing.assert_allclose(forest.predict(X), model.predict(X), rtol=0, atol=1e-9)
+
+
+def test_subset_is_mean_of_chosen_estimators(fitted):
+    model, X = fitted
+    forest = CompiledForest.from_sklearn(model)
+
+    small = forest.subset(n_trees=5)
+    assert small.n_trees == 5
+    np.testing.assert_array_equal(small.predict_trees(X), per_tree(model, X)[:, :5])
+    np.testing.assert_array_equal(small.predict(X), per_tree(model, X)[:, :5].mean(axis=1))
+
+    # Cut at depth 3: each tree predicts what a depth-3 tree grown the same way would
+    shallow = forest.subset(n_trees=3, max_depth=3)
+    for t, est in enumerate(model.estimators_[:3]):
+        tree = est.tree_
+        node = np.zeros(len(X), dtype=np.intp)
+        x = X.astype(np.float32)
+        for _ in range(3):
+            leaf = tree.children_left[node] < 0
+            go_left = x[np.arange(len(X)), tree.feature[node]] <= tree.threshold[node]
+            node = np.where(leaf, node, np.where(go_left, tree.children_left[node], tree.children_right[node]))
+        np.testing.assert_array_equal(shallow.predict_trees(X)[:, t], tree.value[node, 0, 0])
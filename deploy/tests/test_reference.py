@@ -0,0 +1,76 @@
+import json
+
+import pandas as pd
+import pytest
+
+from lib.reference import LEVELS, ReferenceCube, build_reference_cube
+
+# With min_count=2 each row below populates exactly one more level than the rows before it
+LISTINGS = pd.DataFrame([
+    ("78758", "Condo", 2, "Austin", "TX", 100.0),
+    ("78758", "Condo", 2, "Austin", "TX", 200.0),
+    ("78758", "Condo", 3, "Austin", "TX", 300.0),      # 78758|condo has 3 rows
+    ("78758", "Townhouse", 2, "Austin", "TX", 400.0),  # 78758 has 4 rows
+    ("78759", "Condo", 2, "Austin", "TX", 500.0),      # austin|TX has 5 rows
+    ("75201", "Condo", 2, "Dallas", "TX", 600.0),      # TX has 6 rows
+    ("90001", "Condo", 2, "Los Angeles", "CA", 700.0),  # CA alone is below min_count
+    ("02134", "Condo", 2, "Boston", "MA", 800.0),
+    ("2134", "condo", 2, "boston", "ma", 900.0),       # same cells once normalized
+], columns=["ZIPCODE", "PROPERTYTYPE", "BEDROOMS", "CITY", "STATE", "PRICE"])
+
+
+@pytest.fixture(scope="module")
+def cube():
+    return ReferenceCube(build_reference_cube(LISTINGS, min_count=2))
+
+
+@pytest.mark.parametrize("listing, level, median", [
+    (("78758", "Condo", 2, "Austin", "TX"), "zip_type_beds", 150.0),
+    (("78758", "Condo", 3, "Austin", "TX"), "zip_type", 200.0),
+    (("78758", "Townhouse", 2, "Austin", "TX"), "zip", 250.0),
+    (("78759", "Condo", 2, "Austin", "TX"), "city", 300.0),
+    (("75201", "Condo", 2, "Dallas", "TX"), "state", 350.0),
+    (("90001", "Condo", 2, "Los Angeles", "CA"), "global", 500.0),
+    (("2134", " CONDO ", 2, "BOSTON", "ma"), "zip_type_beds", 850.0),
+])
+def test_lookup_returns_the_most_specific_populated_level(cube, listing, level, median):
+    result = cube.lookup(*listing)
+    assert (result["level"], result["median"]) == (level, median)
+
+
+def test_lookup_reports_the_cell(cube):
+    assert cube.lookup("78758", "Condo", 2, "Austin", "TX") == {
+        "level": "zip_type_beds", "key": "78758|condo|2", "count": 2, "median": 150.0, "mean": 150.0,
+    }
+    assert cube.lookup("90001", "Condo", 2, "Los Angeles", "CA") == {
+        "level": "global", "key": None, "count": 9, "median": 500.0, "mean": 500.0,
+    }
+
+
+def test_start_level_skips_the_more_specific_levels(cube):
+    assert cube.lookup("78758", "Condo", 2, "Austin", "TX", start_level="zip")["level"] == "zip"
+    assert cube.lookup("78758", "Condo", 2, "Austin", "TX", start_level="state")["level"] == "state"
+    # Falling back from the start level still works
+    assert cube.lookup("90001", "Condo", 2, "Los Angeles", "CA", start_level="city")["level"] == "global"
+
+
+def test_bedrooms_are_banded():
+    listings = pd.DataFrame([
+        ("78758", "Condo", 5, "Austin", "TX", 100.0),
+        ("78758", "Condo", 7, "Austin", "TX", 300.0),
+    ], columns=LISTINGS.columns)
+    cube = ReferenceCube(build_reference_cube(listings, min_count=2))
+    result = cube.lookup("78758", "Condo", 9, "Austin", "TX")
+    assert (result["level"], result["key"], result["median"]) == ("zip_type_beds", "78758|condo|4", 200.0)
+
+
+def test_cube_round_trips_through_json(tmp_path, cube):
+    raw = build_reference_cube(LISTINGS, min_count=2)
+    assert raw["levels"] == list(LEVELS)
+    assert all(stats[0] >= 2 for cells in raw["cells"].values() for stats in cells.values())
+
+    path = tmp_path / "reference_cube.json"
+    path.write_text(json.dumps(raw))
+    loaded = ReferenceCube.load(str(path))
+    for listing in LISTINGS[["ZIPCODE", "PROPERTYTYPE", "BEDROOMS", "CITY", "STATE"]].itertuples(index=False):
+        assert loaded.lookup(*listing) == cube.lookup(*listing)
@@ -0,0 +1,111 @@
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from lib.streaming import StreamError, iter_records, normalize_record
+
+CSV_TEXT = (
+    'city,state,zipcode,propertytype,note\r\n'
+    'Austin,TX,78758,Condo,plain\r\n'
+    '"Dallas, Uptown",TX,2134,"Single Family","two\r\nlines, and a ""quote"""\r\n'
+    'Houston,TX,77002.0,Townhouse,"é and ,,,"\r\n'
+    'El Paso,TX,79901,Apartment,no newline at the end'
+)
+
+NDJSON_TEXT = (
+    '{"city": "Austin", "state": "TX", "zipcode": 78758, "note": "a\\nb"}\n'
+    '\n'
+    '{"CITY": "Dallas", "STATE": "TX", "ZIPCODE": "2134", "note": "{\\"nested\\": 1}"}\r\n'
+    '{"city": "Houston", "state": "TX", "zipcode": "77002", "note": "no newline at the end"}'
+)
+
+
+def collect(chunks, fmt):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [item async for item in iter_records(source(), fmt)]
+
+    return asyncio.run(run())
+
+
+def split_every(data: bytes, size: int) -> list:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def split_at(data: bytes, *cuts) -> list:
+    bounds = [0, *cuts, len(data)]
+    return [data[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def csv_expected():
+    return [normalize_record(row) for row in csv.DictReader(io.StringIO(CSV_TEXT, newline=""))]
+
+
+def ndjson_expected():
+    return [normalize_record(json.loads(line)) for line in NDJSON_TEXT.splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 64, 10_000])
+def test_csv_records_survive_any_chunking(size):
+    records = collect(split_every(CSV_TEXT.encode(), size), "csv")
+    assert [error for _, _, error in records] == [None] * 4
+    assert [row for row, _, _ in records] == [1, 2, 3, 4]
+    assert [record for _, record, _ in records] == csv_expected()
+
+
+def test_csv_split_inside_crlf_quotes_and_multibyte_characters():
+    data = CSV_TEXT.encode()
+    cuts = [data.index(b"\r\n") + 1, data.index(b'""quote') + 1, data.index("é".encode()) + 1]
+    records = collect(split_at(data, *cuts), "csv")
+    assert [record for _, record, _ in records] == csv_expected()
+    assert records[1][1]["note"] == 'two\r\nlines, and a "quote"'
+    assert records[1][1]["zipcode"] == "02134"
+
+
+def test_csv_bad_row_is_reported_and_the_stream_goes_on():
+    data = b"city,state\nAustin,TX\nonly-one-column\nDallas,TX\n"
+    records = collect(split_every(data, 5), "csv")
+    assert [(row, error is None) for row, _, error in records] == [(1, True), (2, False), (3, True)]
+    assert records[2][1] == {"city": "Dallas", "state": "TX"}
+
+
+def test_csv_unterminated_quote_ends_the_stream():
+    with pytest.raises(StreamError):
+        collect([b'city,note\nAustin,"never closed\n'], "csv")
+
+
+def test_csv_byte_order_mark_is_dropped():
+    records = collect([b"\xef\xbb\xbfcity,state\nAustin,TX\n"], "csv")
+    assert records[0][1] == {"city": "Austin", "state": "TX"}
+
+
+@pytest.mark.parametrize("size", [1, 3, 11, 10_000])
+def test_ndjson_records_survive_any_chunking(size):
+    records = collect(split_every(NDJSON_TEXT.encode(), size), "ndjson")
+    assert [row for row, _, _ in records] == [1, 2, 3]
+    assert [record for _, record, _ in records] == ndjson_expected()
+    assert records[0][1]["zipcode"] == "78758"
+
+
+def test_ndjson_bad_lines_are_reported_per_row():
+    records = collect([b'{"city": "Austin"}\nnot json\n[1, 2]\n{"city": "Dallas"}'], "ndjson")
+    assert [(row, error is None) for row, _, error in records] == [(1, True), (2, False), (3, False), (4, True)]
+
+
+def test_overlong_line_ends_the_stream():
+    from lib import streaming
+
+    async def source():
+        yield b"x" * (streaming.MAX_LINE_BYTES + 1)
+
+    async def run():
+        return [item async for item in iter_records(source(), "ndjson")]
+
+    with pytest.raises(StreamError):
+        asyncio.run(run())